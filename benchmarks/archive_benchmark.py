@@ -0,0 +1,83 @@
+# Show that archiving keeps the hot tier of the memory store bounded under steady load
+# Every round creates a batch of tasks, completes the batch of the round before and then
+# archives what was completed more than one round ago, the same as the background thread
+# does with TASK_MANAGER_ARCHIVE_AFTER. The hot tier settles at about two rounds of tasks
+# while the cold tier keeps growing. Afterwards the cost of a title check is measured for a
+# free title (answered by the Bloom filter) and for an archived one (confirmed on disk).
+# The rounds run under tracemalloc to report the hot tier's memory, which slows the archive
+# timings down too; use them to compare runs, not as absolute costs.
+# Usage: python benchmarks/archive_benchmark.py [--rounds 20] [--batch 10000]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.archive import ColdStore
+from utils.storage import MemoryStore
+
+
+# Return the fields of task number 'n'
+def task_fields(n, created_at):
+    return {
+        'user_id': None, 'title': f'Archive task {n}', 'description': 'Archive benchmark',
+        'status': 'pending', 'duration': 30, 'created_at': created_at, 'updated_at': None, 'completed_at': None,
+    }
+
+
+# Return the microseconds one call of 'function' takes, averaged over 'calls' calls
+def cost(function, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the hot tier size and title checks with archiving')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=10000, help='tasks created per round')
+    parser.add_argument('--checks', type=int, default=20000, help='title checks timed per case')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='archive-benchmark-')
+    store = MemoryStore()
+    store.attach_archive(ColdStore(directory))
+    tracemalloc.start()
+    try:
+        print(f"{'round':>5}{'hot tasks':>12}{'cold tasks':>12}{'hot MB':>9}{'archive s':>11}")
+        previous_ids = []
+        cutoff = None
+        for round_number in range(args.rounds):
+            now = datetime.now(timezone.utc)
+            first = round_number * args.batch
+            ids = [task.id for task in store.add_tasks([task_fields(n, now) for n in range(first, first + args.batch)])]
+            # Complete the previous round's tasks, then archive what was completed before this round
+            store.update_tasks([(task_id, {'status': 'completed', 'updated_at': now, 'completed_at': now})
+                                for task_id in previous_ids])
+            start = time.perf_counter()
+            if cutoff is not None:
+                store.archive_completed(cutoff)
+            seconds = time.perf_counter() - start
+            cutoff = now
+            previous_ids = ids
+            hot_mb = tracemalloc.get_traced_memory()[0] / 1024 / 1024
+            print(f'{round_number + 1:>5}{len(store.tasks):>12,}{len(store.archive):>12,}{hot_mb:>9.1f}{seconds:>11.2f}')
+        tracemalloc.stop()
+
+        print(f"title check, free title:     {cost(lambda: store.is_unique('tasks', 'title', 'Never used'), args.checks):.2f} us")
+        print(f"title check, archived title: {cost(lambda: store.is_unique('tasks', 'title', 'Archive task 0'), args.checks):.2f} us")
+        print(f"read archived task by id:    {cost(lambda: store.get_task(1), args.checks):.2f} us")
+    finally:
+        store.close()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Compare records/second of the bulk endpoints against looping the single-record endpoints
+# The app is driven through Flask's test client, so the numbers include routing,
+# JSON parsing, validation and response building.
+# Usage: python benchmarks/bulk_benchmark.py [--records 5000] [--batch 1000] [--storage memory]
+import argparse
+import os
+import sys
+import time
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Build the user payload for record number 'n'
+def make_user(n):
+    return {'firstName': 'Bench', 'lastName': 'User', 'email': f'user{n}@example.com', 'phone': f'080{n:08d}'}
+
+
+# Build the task payload for record number 'n' (titles must be alphabetic)
+def make_task(n, prefix):
+    letters = ''.join(chr(ord('a') + int(digit)) for digit in str(n))
+    return {'title': f'{prefix}{letters}', 'description': 'Benchmark task', 'duration': 30}
+
+
+# Time 'send' for every batch and return records per second
+def measure(send, batches, records):
+    start = time.perf_counter()
+    for batch in batches:
+        response = send(batch)
+        assert response.status_code == 201, response.get_json()
+    return records / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare bulk and single-record endpoints')
+    parser.add_argument('--records', type=int, default=5000)
+    parser.add_argument('--batch', type=int, default=1000)
+    parser.add_argument('--storage', default='memory', choices=('memory', 'sqlite'))
+    args = parser.parse_args()
+
+    os.environ['TASK_MANAGER_STORAGE'] = args.storage
+    if args.storage == 'sqlite':
+        import tempfile
+        os.environ['TASK_MANAGER_DATABASE'] = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+    import taskManagerApp
+    client = taskManagerApp.app.test_client()
+    records = args.records
+
+    # The single endpoints get the first half of the ID space, the bulk endpoints the second
+    single_users = measure(
+        lambda n: client.post('/api/v1/user/add', json=make_user(n)), range(records), records
+    )
+    bulk_users = measure(
+        lambda start: client.post('/api/v1/user/bulk', json=[
+            make_user(n) for n in range(start, min(start + args.batch, 2 * records))
+        ]),
+        range(records, 2 * records, args.batch), records
+    )
+    single_tasks = measure(
+        lambda n: client.post('/api/v1/task/add', json=make_task(n, 'single')), range(records), records
+    )
+    bulk_tasks = measure(
+        lambda start: client.post('/api/v1/task/bulk', json=[
+            make_task(n, 'bulk') for n in range(start, min(start + args.batch, records))
+        ]),
+        range(0, records, args.batch), records
+    )
+
+    print(f"{'endpoint':<8}{'single rec/s':>16}{'bulk rec/s':>16}{'speedup':>10}")
+    for name, single, bulk in (('users', single_users, bulk_users), ('tasks', single_tasks, bulk_tasks)):
+        print(f'{name:<8}{single:>16,.0f}{bulk:>16,.0f}{bulk / single:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+# Multi-threaded stress test for the storage backends
+# Many threads create users and tasks with deliberately colliding emails, phones and titles,
+# and race to change task statuses. The script exits non-zero if any ID is handed out twice,
+# a duplicate value slips past a uniqueness check, or a completed task is changed again.
+# Usage: python benchmarks/concurrency_stress.py [--threads 16] [--records 2000]
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import MemoryStore, DuplicateRecordError, TaskCompletedError
+from utils.sqlite_store import SQLiteStore
+
+
+# Run 'worker(thread_number)' on every thread, releasing them all at the same moment
+def run_threads(threads, worker):
+    barrier = threading.Barrier(threads)
+    errors = []
+
+    def target(number):
+        barrier.wait()
+        try:
+            worker(number)
+        except Exception as error:
+            errors.append(error)
+
+    pool = [threading.Thread(target=target, args=(number,)) for number in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+# Stress one store and return a list of problems found (empty when everything held)
+def stress(store, threads, records):
+    problems = []
+    created_users = [[] for _ in range(threads)]
+    created_tasks = [[] for _ in range(threads)]
+
+    # Every thread tries to insert the same 'records' users and tasks,
+    # so each value is contested by all threads and exactly one of them may win
+    def create(number):
+        for n in range(records):
+            # Alternate the case of the email so the case-insensitive check is exercised too
+            email = f'User{n}@Example.com' if number % 2 else f'user{n}@example.com'
+            try:
+                user = store.add_user({
+                    'firstName': 'Stress', 'lastName': 'Test', 'email': email, 'phone': f'080{n:08d}'
+                })
+                created_users[number].append(user.id)
+            except DuplicateRecordError:
+                pass
+            try:
+                task = store.add_task({
+                    'user_id': None, 'title': f'Task{n}', 'description': 'Stress',
+                    'status': 'pending', 'duration': 10, 'created_at': datetime.now(timezone.utc),
+                    'updated_at': None, 'completed_at': None
+                })
+                created_tasks[number].append(task.id)
+            except DuplicateRecordError:
+                pass
+
+    run_threads(threads, create)
+
+    # Check that every value was accepted exactly once and IDs were never reused
+    for table, created in (('users', created_users), ('tasks', created_tasks)):
+        ids = [record_id for ids in created for record_id in ids]
+        if len(ids) != records:
+            problems.append(f'{table}: {len(ids)} inserts succeeded for {records} distinct values')
+        if len(set(ids)) != len(ids):
+            problems.append(f'{table}: duplicate IDs were allocated')
+        if store.count(table) != records:
+            problems.append(f'{table}: store holds {store.count(table)} records, expected {records}')
+
+    # Every thread tries to complete and then reopen every task;
+    # once completed, no later change may be applied
+    completions = [0] * threads
+
+    def transition(number):
+        for task_id in range(1, records + 1):
+            for status in ('completed', 'pending'):
+                try:
+                    store.update_task(task_id, {'status': status})
+                    if status == 'completed':
+                        completions[number] += 1
+                except TaskCompletedError:
+                    pass
+
+    run_threads(threads, transition)
+
+    reopened = [task_id for task_id in range(1, records + 1) if store.get_task(task_id).status != 'completed']
+    if reopened:
+        problems.append(f'tasks: {len(reopened)} completed tasks were changed again')
+    if sum(completions) != records:
+        problems.append(f'tasks: {sum(completions)} completions accepted for {records} tasks')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress the storage backends from many threads')
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--records', type=int, default=2000)
+    args = parser.parse_args()
+
+    # Switch threads as often as possible to provoke interleavings
+    sys.setswitchinterval(1e-6)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for store in (MemoryStore(), SQLiteStore(os.path.join(directory, 'stress.db'))):
+            problems = stress(store, args.threads, args.records)
+            store.close()
+            print(f"{store.name}: {'OK' if not problems else 'FAILED'}")
+            for problem in problems:
+                print(f'  {problem}')
+            failed = failed or bool(problems)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
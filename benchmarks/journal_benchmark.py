@@ -0,0 +1,68 @@
+# Measure the cost of the write-ahead journal for the memory store
+# - inserts per second with and without a journal attached
+# - startup time to replay a snapshot plus a log segment back into a fresh store
+# Usage: python benchmarks/journal_benchmark.py [--tasks 1000000]
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.journal import Journal, replay
+from utils.storage import MemoryStore
+
+now = datetime.now(timezone.utc)
+
+
+# Return the task fields for task number 'n'
+def task_fields(n):
+    return {
+        'user_id': None, 'title': f'Task{n}', 'description': 'Journal benchmark', 'status': 'pending',
+        'duration': 30, 'created_at': now, 'updated_at': None, 'completed_at': None
+    }
+
+
+# Insert 'count' tasks one by one into 'store' and return inserts per second
+def insert_rate(store, count):
+    start = time.perf_counter()
+    for n in range(count):
+        store.add_task(task_fields(n))
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure journal write overhead and replay time')
+    parser.add_argument('--tasks', type=int, default=1000000)
+    args = parser.parse_args()
+
+    plain = insert_rate(MemoryStore(), args.tasks)
+    with tempfile.TemporaryDirectory() as directory:
+        store = MemoryStore()
+        store.journal = Journal(directory)
+        store.journal.start(store)
+        journaled = insert_rate(store, args.tasks)
+
+        # Half of the tasks end up in the snapshot, the other half only in the log
+        store.journal.snapshot(store)
+        for task_id in range(1, args.tasks + 1, 2):
+            store.update_task(task_id, {'status': 'in-progress', 'updated_at': now})
+        store.close()
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+        start = time.perf_counter()
+        restored = MemoryStore()
+        replay(restored, directory)
+        elapsed = time.perf_counter() - start
+
+    print(f'{args.tasks:,} tasks')
+    print(f"{'no journal':<16}{plain:>12,.0f} inserts/s")
+    print(f"{'journal':<16}{journaled:>12,.0f} inserts/s")
+    print(f"{'replay':<16}{elapsed:>12.2f} s ({size / 1e6:,.0f} MB on disk, {restored.count('tasks'):,} tasks restored)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# Load test for the HTTP serving modes
+# Opens many keep-alive connections at once and reports requests/sec and latency
+# percentiles for every target, so the WSGI and ASGI modes can be compared side by side.
+# Start the servers first, for example:
+#   gunicorn -w 4 --threads 8 -b 127.0.0.1:5000 taskManagerApp:app
+#   uvicorn --workers 4 --port 8000 taskManagerAsgi:app
+# then run:
+#   python benchmarks/load_test.py wsgi=http://127.0.0.1:5000 asgi=http://127.0.0.1:8000 --connections 1000
+# '--slow-ms' makes every client pause between the headers and the body of its requests,
+# the way clients on slow networks do; that is where a thread per request runs out first.
+# 1000 connections need a matching open-file limit ('ulimit -n 4096').
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from urllib.parse import urlsplit
+
+
+# Return the value of percentile 'p' (0-100) of the sorted list 'values'
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+# Return a random alphabetic task title (titles must be letters only and unique)
+def random_title():
+    return ''.join(random.choices(string.ascii_letters, k=24))
+
+
+# Build the raw HTTP request for one operation and return (head, body)
+def build_request(host, write):
+    if write:
+        body = json.dumps({'title': random_title(), 'description': 'Load test', 'duration': 30}).encode()
+        head = (
+            f'POST /api/v1/task/add HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'
+        ).encode()
+        return head, body
+    return f'GET /api/v1/tasks?limit=20 HTTP/1.1\r\nHost: {host}\r\n\r\n'.encode(), b''
+
+
+# Read one HTTP response and return its status code
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed by the server')
+    length = None
+    close = False
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            close = True
+    if length is None:
+        await reader.read()
+        close = True
+    else:
+        await reader.readexactly(length)
+    return int(status_line.split()[1]), close
+
+
+# Keep one connection busy until 'deadline', recording the latency of every request
+async def client(url, deadline, write_ratio, slow, latencies, failures):
+    parts = urlsplit(url)
+    host = parts.hostname
+    port = parts.port or 80
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            head, body = build_request(parts.netloc, random.random() < write_ratio)
+            start = time.perf_counter()
+            writer.write(head)
+            if body:
+                if slow:
+                    await writer.drain()
+                    await asyncio.sleep(slow)
+                writer.write(body)
+            await writer.drain()
+            code, close = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if code >= 500:
+                failures.append(code)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            failures.append('connection')
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+    if writer is not None:
+        writer.close()
+
+
+# Run the load against one target and return its results
+async def run_target(url, connections, duration, write_ratio, slow):
+    latencies = []
+    failures = []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(url, deadline, write_ratio, slow, latencies, failures) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'failures': len(failures),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare requests/sec and p99 latency of running servers')
+    parser.add_argument('targets', nargs='+', help='name=url pairs, e.g. wsgi=http://127.0.0.1:5000')
+    parser.add_argument('--connections', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per target')
+    parser.add_argument('--write-ratio', type=float, default=0.2, help='share of requests that create a task')
+    parser.add_argument('--slow-ms', type=float, default=0.0, help='pause between request headers and body')
+    args = parser.parse_args()
+
+    print(f'{args.connections} connections, {args.duration:g}s per target, '
+          f'{args.write_ratio:.0%} writes, {args.slow_ms:g} ms client pause')
+    print(f"{'target':<10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'failures':>10}")
+    for target in args.targets:
+        name, _, url = target.partition('=')
+        result = asyncio.run(run_target(url or name, args.connections, args.duration, args.write_ratio, args.slow_ms / 1000))
+        print(f"{name:<10}{result['requests']:>10,}{result['rps']:>10,.0f}{result['p50_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['failures']:>10,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# Report the memory used per stored task: the old dictionary records with ISO string
+# timestamps against the slotted Task records
+# Titles and descriptions are built the same way for both layouts, so the difference
+# is the cost of the record itself.
+# Usage: python benchmarks/memory_benchmark.py [--tasks 1000000]
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.models import Task, TaskStatus
+
+start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+# Build task number 'n' in the old dictionary layout
+def dict_task(n):
+    return {
+        'id': n,
+        'user_id': n % 1000 + 1,
+        'title': f'Task{n}',
+        'description': 'Memory benchmark',
+        'status': 'pending',
+        'duration': 30,
+        'created_at': (start + timedelta(seconds=n)).isoformat(),
+        'updated_at': None,
+        'completed_at': None
+    }
+
+
+# Build task number 'n' as a slotted record
+def record_task(n):
+    return Task(
+        n, n % 1000 + 1, f'Task{n}', 'Memory benchmark', TaskStatus.PENDING, 30,
+        start + timedelta(seconds=n)
+    )
+
+
+# Return the bytes allocated per task when 'count' tasks built by 'build' are stored in a dict
+def bytes_per_task(build, count):
+    gc.collect()
+    tracemalloc.start()
+    tasks = {n: build(n) for n in range(1, count + 1)}
+    used = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tasks
+    return used / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure bytes per stored task')
+    parser.add_argument('--tasks', type=int, default=1000000)
+    args = parser.parse_args()
+
+    old = bytes_per_task(dict_task, args.tasks)
+    new = bytes_per_task(record_task, args.tasks)
+    print(f'{args.tasks:,} tasks')
+    print(f"{'dict records':<16}{old:>10,.0f} bytes/task")
+    print(f"{'Task records':<16}{new:>10,.0f} bytes/task")
+    print(f"{'saved':<16}{old - new:>10,.0f} bytes/task ({(old - new) / old:.0%})")
+
+
+if __name__ == '__main__':
+    main()
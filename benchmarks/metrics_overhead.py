@@ -0,0 +1,74 @@
+# Estimate the overhead of TASK_MANAGER_METRICS on every endpoint
+# Comparing two whole runs is too noisy to resolve a few percent, so the overhead is built
+# from parts that can be measured precisely:
+#   cost of one timed call (wrapper + histogram observation), best of several loops
+#   x observations recorded per request of each endpoint
+#   / mean time of a request to that endpoint
+# Usage: python benchmarks/metrics_overhead.py [--requests 2000]
+import argparse
+import os
+import sys
+import time
+
+# Turn the metrics on before the app is imported
+os.environ['TASK_MANAGER_METRICS'] = '1'
+
+# Make the project root and the suite importable when the script is run directly
+benchmarks = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(benchmarks))
+sys.path.insert(0, benchmarks)
+
+from utils import metrics
+from suite import TestClientTarget, preload, endpoints, drive
+
+
+def noop():
+    return None
+
+
+# Return the extra seconds one timed call costs over a plain call
+def timed_call_cost(calls=200000, rounds=5):
+    timed_noop = metrics.timed('overhead_probe', noop)
+    best_plain = best_timed = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(calls):
+            noop()
+        best_plain = min(best_plain, time.perf_counter() - start)
+        start = time.perf_counter()
+        for _ in range(calls):
+            timed_noop()
+        best_timed = min(best_timed, time.perf_counter() - start)
+    del metrics.stages['overhead_probe']
+    return (best_timed - best_plain) / calls
+
+
+# Return the number of observations recorded in every histogram so far
+def observations():
+    return sum(h.count for h in metrics.stages.values()) + sum(h.count for h in metrics.requests.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Estimate the per-endpoint overhead of the metrics')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=1000)
+    args = parser.parse_args()
+
+    cost = timed_call_cost()
+    print(f'one timed call costs {cost * 1e6:.2f} microseconds')
+
+    target = TestClientTarget()
+    preload(target, args.users, args.tasks)
+    print(f"{'endpoint':<22}{'obs/request':>12}{'mean ms':>10}{'overhead':>10}")
+    for name, expected, build in endpoints(args.users, args.tasks):
+        requests = args.requests if not name.startswith('bulk_') else max(1, args.requests // 40)
+        before = observations()
+        latencies, _ = drive(target, build, expected, 0, requests)
+        per_request = (observations() - before) / requests
+        mean = sum(latencies) / len(latencies)
+        print(f'{name:<22}{per_request:>12.1f}{mean * 1000:>10.3f}{per_request * cost / mean:>10.2%}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+# Compare the standard response path with the fast serializer path
+# "before": format_response copies the record, make_response builds the envelope with a fresh
+#           timestamp and the standard library encodes it the way Flask's default provider does
+# "after":  the stored record goes straight into serializer.encode_envelope
+# Reports bytes/sec of encoded JSON and bytes allocated per response (peak, via tracemalloc).
+# Usage: python benchmarks/serializer_benchmark.py [--responses 100000]
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import serializer
+from utils.models import Task, TaskStatus
+from utils.response import format_response
+
+# A stored task record, as the store hands it to the handlers
+task = Task(
+    42, 7, 'Benchmark', 'Serialize me', TaskStatus.IN_PROGRESS, 45,
+    datetime(2024, 1, 1, tzinfo=timezone.utc), datetime(2024, 1, 1, 1, tzinfo=timezone.utc)
+)
+
+
+# The response path before this change
+def before():
+    body = {
+        'status': 'success',
+        'message': 'Task retrieved successfully',
+        'data': format_response(task, 'task'),
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+    return json.dumps(body, ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+
+# The fast path
+def after():
+    return serializer.encode_envelope('success', 'Task retrieved successfully', task)
+
+
+# Return encoded bytes per second for 'encode'
+def throughput(encode, responses):
+    start = time.perf_counter()
+    size = 0
+    for _ in range(responses):
+        size += len(encode())
+    return size / (time.perf_counter() - start)
+
+
+# Return the average peak bytes allocated while building one response
+def allocations(encode, samples=1000):
+    encode()
+    tracemalloc.start()
+    total = 0
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        encode()
+        total += tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return total / samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare response serialization paths')
+    parser.add_argument('--responses', type=int, default=100000)
+    args = parser.parse_args()
+
+    print(f'serializer backend: {serializer.backend}')
+    print(f"{'path':<8}{'MB/s':>10}{'responses/s':>14}{'alloc B/resp':>14}")
+    for name, encode in (('before', before), ('after', after)):
+        rate = throughput(encode, args.responses)
+        per_response = len(encode())
+        print(f'{name:<8}{rate / 1e6:>10.1f}{rate / per_response:>14,.0f}{allocations(encode):>14,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+# Measure how long a fresh worker takes to serve its first response
+#   cold: a new interpreter imports taskManagerApp, builds the app and answers one request
+#   warm: the same with TASK_MANAGER_JOURNAL pointing at a persisted dataset, once with a
+#         binary snapshot (memory-mapped, see utils/snapshot.py) and once with NDJSON
+# Every case runs in new processes; the median of '--runs' starts is reported, both as
+# import-to-first-response time (measured inside the worker) and as the whole process start.
+# With '--budget-ms' / '--warm-budget-ms' the script exits with status 1 when the median
+# import-to-first-response time is over budget, so CI can run it as a check:
+#   python benchmarks/startup_benchmark.py --budget-ms 600 --warm-budget-ms 2500
+# Usage: python benchmarks/startup_benchmark.py [--runs 5] [--users 10000] [--tasks 100000]
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+# What a worker does at startup, up to its first response
+WORKER = '''
+import json, time
+start = time.perf_counter()
+import taskManagerApp
+imported = time.perf_counter()
+client = taskManagerApp.create_app().test_client()
+status = client.get('/api/v1/tasks?limit=1').status_code
+done = time.perf_counter()
+print(json.dumps({'import_ms': (imported - start) * 1000, 'first_response_ms': (done - start) * 1000, 'status': status}))
+'''
+
+
+# Start one worker with 'environment' and return (its own timings, whole process milliseconds)
+def start_worker(environment):
+    start = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER], cwd=root, env=environment, capture_output=True, text=True, check=True
+    ).stdout
+    process_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    if result['status'] != 200:
+        raise RuntimeError(f"first request returned {result['status']}")
+    return result, process_ms
+
+
+# Start 'runs' workers and return the medians of their timings
+def measure(runs, extra_environment=None):
+    # Start from the current environment, without a journal unless the case sets one
+    environment = dict(os.environ)
+    environment.pop('TASK_MANAGER_JOURNAL', None)
+    environment.update(extra_environment or {})
+    results = [start_worker(environment) for _ in range(runs)]
+    return {
+        'import_ms': statistics.median(result['import_ms'] for result, _ in results),
+        'first_response_ms': statistics.median(result['first_response_ms'] for result, _ in results),
+        'process_ms': statistics.median(process_ms for _, process_ms in results),
+    }
+
+
+# Persist 'users' users and 'tasks' tasks in a journal directory as a snapshot of 'snapshot_format'
+def build_dataset(directory, users, tasks, snapshot_format):
+    from utils.journal import open_journal
+    from utils.storage import MemoryStore
+    store = MemoryStore()
+    journal = open_journal(store, directory, snapshot_format=snapshot_format)
+    created_at = datetime.now(timezone.utc)
+    for start in range(0, users, 10000):
+        store.add_users([
+            {'firstName': 'Startup', 'lastName': 'Bench', 'email': f'startup{n}@example.com', 'phone': f'080{n:08d}'}
+            for n in range(start, min(users, start + 10000))
+        ])
+    for start in range(0, tasks, 10000):
+        store.add_tasks([
+            {
+                'user_id': n % users + 1 if users else None, 'title': f'Startup task {n}',
+                'description': 'Startup benchmark', 'status': 'completed' if n % 3 == 0 else 'pending',
+                'duration': 30, 'created_at': created_at, 'updated_at': None,
+                'completed_at': created_at if n % 3 == 0 else None,
+            }
+            for n in range(start, min(tasks, start + 10000))
+        ])
+    journal.snapshot(store)
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure worker start-up to the first response')
+    parser.add_argument('--runs', type=int, default=5, help='worker starts per case')
+    parser.add_argument('--users', type=int, default=10000, help='users in the warm-start dataset')
+    parser.add_argument('--tasks', type=int, default=100000, help='tasks in the warm-start dataset (0 to skip)')
+    parser.add_argument('--budget-ms', type=float, help='fail when a cold start takes longer')
+    parser.add_argument('--warm-budget-ms', type=float, help='fail when a binary warm start takes longer')
+    args = parser.parse_args()
+
+    cases = [('cold', measure(args.runs, {'TASK_MANAGER_STORAGE': 'memory'}))]
+    directory = tempfile.mkdtemp(prefix='startup-benchmark-')
+    try:
+        if args.tasks:
+            for snapshot_format in ('binary', 'ndjson'):
+                journal = os.path.join(directory, snapshot_format)
+                build_dataset(journal, args.users, args.tasks, snapshot_format)
+                cases.append((f'warm {snapshot_format}', measure(args.runs, {
+                    'TASK_MANAGER_STORAGE': 'memory', 'TASK_MANAGER_JOURNAL': journal,
+                    'TASK_MANAGER_SNAPSHOT_INTERVAL': '0',
+                })))
+    finally:
+        shutil.rmtree(directory)
+
+    print(f'{args.users:,} users and {args.tasks:,} tasks in the warm-start dataset, median of {args.runs} starts')
+    print(f"{'case':<14}{'import ms':>11}{'first response ms':>19}{'process ms':>12}")
+    for name, result in cases:
+        print(f"{name:<14}{result['import_ms']:>11.1f}{result['first_response_ms']:>19.1f}{result['process_ms']:>12.1f}")
+
+    failed = False
+    results = dict(cases)
+    for name, budget in (('cold', args.budget_ms), ('warm binary', args.warm_budget_ms)):
+        if budget is None or name not in results:
+            continue
+        took = results[name]['first_response_ms']
+        if took > budget:
+            print(f'OVER BUDGET {name}: {took:.1f} ms, budget {budget:.1f} ms')
+            failed = True
+        else:
+            print(f'{name} within budget: {took:.1f} ms of {budget:.1f} ms')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Measure the per-user task aggregates of the memory store:
+#   read:    store.user_stats, the O(1) read behind GET /api/v1/user/<id>/stats
+#   scan:    computing the same numbers by walking every task of the store
+#   rebuild: recomputing every user's aggregates, in pure Python and with NumPy when installed
+# Usage: python benchmarks/stats_benchmark.py [--users 1000] [--tasks 100000]
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import stats
+from utils.storage import MemoryStore
+
+
+# Fill a memory store with 'users' users and 'tasks' tasks, every third one completed
+def build_store(users, tasks):
+    store = MemoryStore()
+    store.add_users([
+        {'firstName': 'Stats', 'lastName': 'Bench', 'email': f'stats{n}@example.com', 'phone': f'080{n:08d}'}
+        for n in range(users)
+    ])
+    created_at = datetime.now(timezone.utc)
+    store.add_tasks([
+        {
+            'user_id': n % users + 1, 'title': f'Stats task {n}', 'description': 'Stats benchmark',
+            'status': 'completed' if n % 3 == 0 else 'pending', 'duration': n % 120 + 1,
+            'created_at': created_at, 'updated_at': None,
+            'completed_at': created_at + timedelta(minutes=n % 120 + 1) if n % 3 == 0 else None,
+        }
+        for n in range(tasks)
+    ])
+    return store
+
+
+# Return the seconds one call of 'function' takes, best of 'rounds' runs of 'calls' calls
+def best(function, calls, rounds=3):
+    fastest = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        fastest = min(fastest, time.perf_counter() - start)
+    return fastest / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure reading and rebuilding per-user task aggregates')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--tasks', type=int, default=100000)
+    args = parser.parse_args()
+
+    store = build_store(args.users, args.tasks)
+    tasks = list(store.tasks.values())
+
+    def scan():
+        result = stats.UserStats()
+        for task in tasks:
+            if task.user_id == 1:
+                stats.count_task(result, task)
+        return result
+
+    print(f'{args.users:,} users, {args.tasks:,} tasks')
+    print(f"read    {best(lambda: store.user_stats(1), 100000) * 1e6:>12.2f} us")
+    print(f"scan    {best(scan, 5) * 1e6:>12.2f} us")
+
+    # Time the pure-Python rebuild even when NumPy is installed, by hiding it for the call
+    numpy = sys.modules.get('numpy')
+    sys.modules['numpy'] = None
+    try:
+        python_seconds = best(lambda: stats.rebuild_stats(tasks), 1)
+    finally:
+        if numpy is None:
+            del sys.modules['numpy']
+        else:
+            sys.modules['numpy'] = numpy
+    print(f"rebuild {python_seconds * 1000:>12.2f} ms (python)")
+    try:
+        import numpy
+    except ImportError:
+        print('rebuild            - (numpy is not installed)')
+        return
+    print(f"rebuild {best(lambda: stats.rebuild_stats(tasks), 1) * 1000:>12.2f} ms (numpy {numpy.__version__})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Compare insert and lookup throughput of the storage backends
+# Usage: python benchmarks/storage_benchmark.py [--records 20000]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.storage import MemoryStore
+from utils.sqlite_store import SQLiteStore
+
+
+# Build the user payload for record number 'n'
+def make_user(n):
+    return {
+        'firstName': 'Bench',
+        'lastName': 'User',
+        'email': f'user{n}@example.com',
+        'phone': f'080{n:08d}'
+    }
+
+
+# Build the task payload for record number 'n'
+def make_task(n, user_id):
+    return {
+        'user_id': user_id,
+        'title': f'Task{n}',
+        'description': 'Benchmark task',
+        'status': 'pending',
+        'duration': 30,
+        'created_at': datetime.now(timezone.utc),
+        'updated_at': None,
+        'completed_at': None
+    }
+
+
+# Time 'operation' over every item of 'items' and return operations per second
+def measure(operation, items):
+    start = time.perf_counter()
+    for item in items:
+        operation(item)
+    elapsed = time.perf_counter() - start
+    return len(items) / elapsed if elapsed else float('inf')
+
+
+# Run the insert and lookup workload against one store
+def run(store, records):
+    results = {}
+    results['insert user'] = measure(lambda n: store.add_user(make_user(n)), range(records))
+    results['insert task'] = measure(lambda n: store.add_task(make_task(n, n % records + 1)), range(records))
+
+    # Look records up in random order so caches don't flatter the numbers
+    ids = [random.randint(1, records) for _ in range(records)]
+    results['get task'] = measure(store.get_task, ids)
+    results['unique email'] = measure(
+        lambda n: store.is_unique('users', 'email', f'user{n}@example.com'), ids
+    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare storage backend throughput')
+    parser.add_argument('--records', type=int, default=20000, help='users and tasks to insert per backend')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        stores = [MemoryStore(), SQLiteStore(os.path.join(directory, 'bench.db'))]
+        rows = {store.name: run(store, args.records) for store in stores}
+        for store in stores:
+            store.close()
+
+    # Print one line per operation with the ops/sec of every backend
+    names = list(rows)
+    print(f"{'operation':<14}" + ''.join(f'{name:>14}' for name in names))
+    for operation in rows[names[0]]:
+        print(f'{operation:<14}' + ''.join(f'{rows[name][operation]:>14,.0f}' for name in names))
+
+
+if __name__ == '__main__':
+    main()
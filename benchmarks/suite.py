@@ -0,0 +1,290 @@
+# Benchmark suite for every API endpoint
+# Preloads the store with a dataset of the chosen size, then drives each endpoint through
+# Flask's test client (or a running server with '--url') and reports per endpoint:
+# requests/sec, p50/p95/p99 latency and the peak memory allocated while serving it.
+# Results are written as JSON; with '--baseline' the run is compared against an earlier
+# result file and the script exits with status 1 when an endpoint regressed by more than
+# '--threshold' (lower req/s or higher p99).
+#
+# Usage:
+#   python benchmarks/suite.py --users 10000 --tasks 100000 --output results.json
+#   python benchmarks/suite.py --baseline main.json --threshold 0.15
+#   python benchmarks/suite.py --url http://127.0.0.1:5000 --users 1000 --tasks 1000
+# The backend is chosen as usual with TASK_MANAGER_STORAGE / TASK_MANAGER_DATABASE.
+import argparse
+import gc
+import http.client
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# Make the project root importable when the script is run directly
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Records are inserted in batches of this size while preloading
+preload_batch = 10000
+
+
+# Return a unique alphabetic name for number 'n' (titles and names must be letters only)
+def letters(n, prefix='Bench'):
+    text = ''
+    n += 1
+    while n:
+        n, remainder = divmod(n - 1, 26)
+        text = chr(ord('a') + remainder) + text
+    return prefix + text
+
+
+# Build the payload of user number 'n'
+def user_payload(n):
+    return {'firstName': letters(n), 'lastName': 'Suite', 'email': f'suite{n}@example.com', 'phone': f'080{n:08d}'}
+
+
+# Build the payload of task number 'n'
+def task_payload(n, user_id=None):
+    payload = {'title': letters(n, 'Task'), 'description': 'Benchmark suite task', 'duration': 30}
+    if user_id is not None:
+        payload['user_id'] = user_id
+    return payload
+
+
+# Return the value of percentile 'p' (0-100) of the sorted list 'values'
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+# Sends requests through Flask's test client, in this process
+class TestClientTarget:
+    remote = False
+
+    def __init__(self):
+        from taskManagerApp import app
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        response = self.client.open(path, method=method, json=body)
+        # Read streamed bodies (the exports) to the end, so their time and memory are measured
+        for _ in response.response:
+            pass
+        response.close()
+        return response.status_code
+
+
+# Sends requests over one keep-alive connection to a running server
+class ServerTarget:
+    remote = True
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+
+    def request(self, method, path, body=None):
+        headers = {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            self.connection.request(method, path, data, headers)
+            response = self.connection.getresponse()
+        except (http.client.HTTPException, OSError):
+            # The server closed the connection; reconnect and retry once
+            self.connection.close()
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            self.connection.request(method, path, data, headers)
+            response = self.connection.getresponse()
+        response.read()
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+        return response.status
+
+
+# Fill the store with 'users' users and 'tasks' tasks
+# In-process runs insert straight into the store; server runs go through the bulk endpoints
+def preload(target, users, tasks):
+    if not target.remote:
+        from taskManagerApp import store, new_task
+        created_at = datetime.now(timezone.utc)
+        for start in range(0, users, preload_batch):
+            store.add_users([user_payload(n) for n in range(start, min(users, start + preload_batch))])
+        for start in range(0, tasks, preload_batch):
+            store.add_tasks([
+                new_task(task_payload(n), n % users + 1 if users else None, created_at)
+                for n in range(start, min(tasks, start + preload_batch))
+            ])
+        return
+    for start in range(0, users, preload_batch):
+        target.request('POST', '/api/v1/user/bulk', [user_payload(n) for n in range(start, min(users, start + preload_batch))])
+    for start in range(0, tasks, preload_batch):
+        target.request('POST', '/api/v1/task/bulk', [
+            task_payload(n, n % users + 1 if users else None) for n in range(start, min(tasks, start + preload_batch))
+        ])
+
+
+# Return the endpoints to measure as (name, expected status, request builder)
+# Every builder turns a request number into (method, path, body); numbers are unique
+# per run, so creates never collide with the preloaded records or each other
+def endpoints(users, tasks):
+    # Flip preloaded tasks between pending and in-progress (never completed, so they stay updatable)
+    def status_update(i):
+        status = 'in-progress' if (i // max(tasks, 1)) % 2 == 0 else 'pending'
+        return 'PUT', f'/api/v1/task/{i % max(tasks, 1) + 1}/status/update', {'status': status}
+
+    return [
+        ('create_user', 201, lambda i: ('POST', '/api/v1/user/add', user_payload(users + i))),
+        ('create_task', 201, lambda i: ('POST', '/api/v1/task/add', task_payload(tasks + i, i % max(users, 1) + 1 if users else None))),
+        ('mark_task_status', 200, status_update),
+        ('get_task', 200, lambda i: ('GET', f'/api/v1/task/{i % max(tasks, 1) + 1}', None)),
+        ('get_user', 200, lambda i: ('GET', f'/api/v1/user/{i % max(users, 1) + 1}', None)),
+        ('user_stats', 200, lambda i: ('GET', f'/api/v1/user/{i % max(users, 1) + 1}/stats', None)),
+        ('list_tasks', 200, lambda i: ('GET', f'/api/v1/tasks?limit=20&cursor={i % max(tasks, 1)}', None)),
+        ('list_tasks_by_status', 200, lambda i: ('GET', '/api/v1/tasks?status=pending&limit=20', None)),
+        ('metrics', 200, lambda i: ('GET', '/metrics', None)),
+        ('export_users', 200, lambda i: ('GET', '/api/v1/users/export', None)),
+        ('export_tasks', 200, lambda i: ('GET', '/api/v1/tasks/export', None)),
+        ('bulk_users', 201, lambda i: ('POST', '/api/v1/user/bulk', [user_payload(10 ** 7 + i * 100 + n) for n in range(100)])),
+        ('bulk_tasks', 201, lambda i: ('POST', '/api/v1/task/bulk', [task_payload(10 ** 7 + i * 100 + n) for n in range(100)])),
+        ('bulk_status', 200, lambda i: ('PUT', '/api/v1/tasks/status', [
+            {'id': (i * 100 + n) % max(tasks, 1) + 1, 'status': 'in-progress' if i % 2 else 'pending'} for n in range(100)
+        ])),
+    ]
+
+
+# Send 'count' requests built by 'build', starting at request number 'first'
+# and return the sorted latencies (seconds) and the number of unexpected status codes
+def drive(target, build, expected, first, count):
+    latencies = []
+    errors = 0
+    for i in range(first, first + count):
+        method, path, body = build(i)
+        start = time.perf_counter()
+        status = target.request(method, path, body)
+        latencies.append(time.perf_counter() - start)
+        if status != expected:
+            errors += 1
+    latencies.sort()
+    return latencies, errors
+
+
+# Measure one endpoint: a timed pass, then a shorter pass under tracemalloc for the peak memory
+# (tracemalloc slows every allocation down, so it is kept out of the timed pass)
+def measure(target, build, expected, requests, memory_requests):
+    warmup = max(1, requests // 20)
+    drive(target, build, expected, 0, warmup)
+    gc.collect()
+    start = time.perf_counter()
+    latencies, errors = drive(target, build, expected, warmup, requests)
+    elapsed = time.perf_counter() - start
+
+    peak_kb = None
+    if not target.remote and memory_requests:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        drive(target, build, expected, warmup + requests, memory_requests)
+        peak_kb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024
+        tracemalloc.stop()
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': requests / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'peak_kb': peak_kb,
+    }
+
+
+# Compare 'results' with 'baseline' and return the list of regressions beyond 'threshold'
+def regressions(results, baseline, threshold):
+    found = []
+    for name, result in results['endpoints'].items():
+        before = baseline.get('endpoints', {}).get(name)
+        if before is None:
+            continue
+        if result['rps'] < before['rps'] * (1 - threshold):
+            found.append(f"{name}: {result['rps']:,.0f} req/s, baseline {before['rps']:,.0f}")
+        if result['p99_ms'] > before['p99_ms'] * (1 + threshold):
+            found.append(f"{name}: p99 {result['p99_ms']:.2f} ms, baseline {before['p99_ms']:.2f} ms")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every endpoint and compare with a baseline')
+    parser.add_argument('--users', type=int, default=1000, help='users preloaded before measuring')
+    parser.add_argument('--tasks', type=int, default=1000, help='tasks preloaded before measuring')
+    parser.add_argument('--requests', type=int, default=2000, help='timed requests per endpoint')
+    parser.add_argument('--bulk-requests', type=int, default=50, help='timed requests per bulk or export endpoint')
+    parser.add_argument('--memory-requests', type=int, default=200, help='requests traced for peak memory (0 to skip)')
+    parser.add_argument('--only', nargs='*', help='measure only these endpoints')
+    parser.add_argument('--url', help='benchmark a running server instead of the test client')
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='earlier result file to compare with')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed regression, as a fraction')
+    args = parser.parse_args()
+
+    target = ServerTarget(args.url) if args.url else TestClientTarget()
+    start = time.perf_counter()
+    preload(target, args.users, args.tasks)
+    print(f'preloaded {args.users:,} users and {args.tasks:,} tasks in {time.perf_counter() - start:.1f}s')
+
+    from utils import serializer
+    results = {
+        'meta': {
+            'target': args.url or 'test-client',
+            'storage': os.environ.get('TASK_MANAGER_STORAGE', 'memory'),
+            'serializer': serializer.backend,
+            'python': platform.python_version(),
+            'users': args.users,
+            'tasks': args.tasks,
+            'date': datetime.now(timezone.utc).isoformat(),
+        },
+        'endpoints': {},
+    }
+
+    print(f"{'endpoint':<22}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KB':>10}{'errors':>8}")
+    for name, expected, build in endpoints(args.users, args.tasks):
+        if args.only and name not in args.only:
+            continue
+        # Bulk and export requests handle many records each, so they get fewer requests
+        bulk = name.startswith(('bulk_', 'export_'))
+        requests = args.bulk_requests if bulk else args.requests
+        memory_requests = min(args.memory_requests, requests)
+        result = measure(target, build, expected, requests, memory_requests)
+        results['endpoints'][name] = result
+        peak = f"{result['peak_kb']:,.0f}" if result['peak_kb'] is not None else '-'
+        print(f"{name:<22}{result['rps']:>10,.0f}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{peak:>10}{result['errors']:>8}")
+
+    # ru_maxrss is in kilobytes on Linux
+    results['meta']['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with open(args.output, 'w') as file:
+        json.dump(results, file, indent=2)
+    print(f'results written to {args.output}')
+
+    failed = any(result['errors'] for result in results['endpoints'].values())
+    if failed:
+        print('some requests returned an unexpected status code')
+    if args.baseline:
+        with open(args.baseline) as file:
+            found = regressions(results, json.load(file), args.threshold)
+        for regression in found:
+            print(f'REGRESSION {regression}')
+        if not found:
+            print(f'no regression beyond {args.threshold:.0%} against {args.baseline}')
+        failed = failed or bool(found)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,71 @@
 # Import the Flask class and the request object from the flask module
 # Flask is used to create the web application, while request handles incoming HTTP data
-from flask import Flask, request
+from flask import Flask, request, Response, g, current_app
+from werkzeug.http import parse_accept_header
+from werkzeug.routing import IntegerConverter
+
+# Import the datetime class and timezone object to timestamp task records
+from datetime import datetime, timezone
+
+# Import time to measure how long requests take and os to read the configuration
+import time
+import os
 
 # Import various validation helper functions from the 'utils.validators' module
 # These functions help ensure that incoming user data meets specific requirements
 from utils.validators import (
-    validate_payload,          # Ensures that the request payload exists and is valid JSON
-    validate_required_fields,  # Checks that specific fields are present in the payload
-    validate_field_length,     # Ensures that certain fields meet the minimum character length
-    validate_email,            # Validates the format of the email address
-    validate_phone,            # Validates the phone number for correct digits and prefix
-    validate_unique_field      # Ensures that fields like email and phone are unique
+    compile_schema,            # Compiles a payload schema into a single validator function
+    required,                  # Rule: the field is present and not blank
+    alphabetic,                # Rule: the field is alphabetic with a minimum length
+    text,                      # Rule: the field is a string
+    email,                     # Rule: the field is a valid email address
+    phone,                     # Rule: the field is a valid phone number
+    positive_int,              # Rule: the field is a positive integer
+    MAX_INT64                  # Largest integer a record can hold
 )
 
+# Import the response serializer
+from utils import serializer
+from utils.serializer import FastJSONProvider
+
+# Import the storage layer that holds users and tasks
+from utils.storage import create_store, DuplicateRecordError, TaskCompletedError
+from utils.indexes import index_key
+
+# Import the formatter of the per-user task aggregates
+from utils.stats import format_stats
+
+# Import the request metrics and the slow-request profiler
+from utils import metrics
+
+# Import the cache of encoded records served by the read endpoints
+from utils.cache import LRUCache
+
 # Import response helper functions from the 'utils.response' module
 # These standardize the structure and format of API responses
 from utils.response import (
-    make_response,             # Builds a standardized response object
     success_response,          # Generates a success message response (HTTP 200)
     bad_request_response,      # Generates an error response for invalid requests (HTTP 400)
     not_found_response,        # Generates an error response for missing resources (HTTP 404)
-    internal_error_response,   # Generates an error response for server errors (HTTP 500)
-    format_response            # Formats data before sending it in the response
+    response_data,             # Formats data, or passes records through for the fast serializer
+    ndjson_stream,             # Streams records as newline-delimited JSON
+    gzip_stream,               # Gzips a stream as it is produced
+    make_etag,                 # Builds the ETag of a record version
+    etag_matches               # Checks an If-None-Match header against an ETag
 )
 
-# Initialize a Flask application instance
-# '__name__' tells Flask where to find resources like templates and static files
-app = Flask(__name__)
+# The Flask app, its store and its record cache are built by create_app (at the end of this
+# module) when a worker starts, not when the module is imported; the handlers reach them
+# through current_store() and current_record_cache(). 'taskManagerApp.app' and its
+# 'taskManagerApp.store' and 'taskManagerApp.record_cache' are created on first access
+# (see __getattr__ below).
 
-# Create in-memory dictionaries to act as simple databases
-# 'users' will store user records, and 'tasks' will store task records
-users = {}
-tasks = {}
-
-# Initialize auto-incrementing ID counters for users and tasks
-# These help generate unique IDs for each new user or task
-next_user_id = 1
-next_task_id = 1
+# Error messages returned when a unique field is already taken
+duplicate_messages = {
+    ('users', 'email'): "User with email '{}' already exists",
+    ('users', 'phone'): "User with phone number '{}' already exists",
+    ('tasks', 'title'): "Task with title '{}' already exists"
+}
 
 # Define a sample user model structure for reference
 # Each user record must include an ID, first name, last name, email, and phone number
@@ -48,148 +77,303 @@ user = {
     'phone': '08160840249'
 }
 
+# Error messages shared by the single and bulk endpoints
+phone_message = (
+    "Phone number must be numeric and at least 11 digits long "
+    "starting with a valid prefix (070, 080, 090, 081, 091)"
+)
+duration_message = (
+    "Duration must be a positive integer representing minutes, "
+    "and must not be less than 5 minutes"
+)
+
+# Largest number of records accepted by one bulk request
+max_bulk_items = 10000
+
+# Allowed task statuses
+allowed_statuses = ['pending', 'in-progress', 'completed']
+
+# Default and largest page size of the task listing
+default_page_size = 20
+max_page_size = 100
+
+# Payload validators, compiled once from declarative schemas
+# Each returns the list of every field error in the payload (empty when it is valid);
+# uniqueness and user existence are checked separately, against the store
+validate_user_data = compile_schema({
+    'firstName': [required(), alphabetic()],
+    'lastName': [required(), alphabetic()],
+    'email': [required(), email()],
+    'phone': [required(), phone(phone_message)]
+})
+validate_task_data = compile_schema({
+    'title': [required(), alphabetic()],
+    'description': [required(), text()],
+    'duration': [required(), positive_int(duration_message)]
+})
+# The bulk checkers validate one record at a time with these; they are timed once per
+# batch (below) rather than once per record
+validate_user_item = validate_user_data
+validate_task_item = validate_task_data
+
+# Time the handler stages when TASK_MANAGER_METRICS is set (see utils/metrics.py)
+# Each stage is timed by wrapping the function that performs it; the handlers look these
+# names up when they run, so they call the timed versions
+# (the JSON provider and the store are wrapped when create_app builds them)
+if metrics.enabled:
+    validate_user_data = metrics.timed('validation', validate_user_data)
+    validate_task_data = metrics.timed('validation', validate_task_data)
+    response_data = metrics.timed('format', response_data)
+    success_response = metrics.timed('envelope', success_response)
+    bad_request_response = metrics.timed('envelope', bad_request_response)
+    not_found_response = metrics.timed('envelope', not_found_response)
+
+# Time every request, and sample the stacks of slow ones when the profiler is on
+# (registered by create_app only when metrics or the profiler are enabled)
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    if metrics.profiler:
+        metrics.profiler.begin()
+
+def record_request_time(response):
+    seconds = time.perf_counter() - g.request_start
+    if metrics.enabled:
+        metrics.observe_request(request.endpoint, seconds)
+    if metrics.profiler:
+        metrics.profiler.end(request.endpoint, seconds)
+    return response
+
+# Return the store of the app handling the current request
+def current_store():
+    return current_app.extensions['store']
+
+# Return the encoded-record cache of the app handling the current request
+def current_record_cache():
+    return current_app.extensions['record_cache']
+
+# Return the owner id of a task payload, or None when no valid 'user_id' is provided
+def task_user_id(data):
+    user_id = data.get('user_id')
+    # bool is a subclass of int, but true/false is not a user id
+    if isinstance(user_id, int) and not isinstance(user_id, bool) and user_id > 0:
+        return user_id
+    return None
+
+# Build the fields of a new task (the store assigns its ID)
+def new_task(data, user_id, created_at):
+    return {
+        'user_id': user_id,
+        'title': data['title'],
+        'description': data['description'],
+        'status': 'pending',
+        'duration': data['duration'],
+        'created_at': created_at,
+        'updated_at': None,
+        'completed_at': None
+    }
+
+# Validate the body of a bulk request and return the first error message, or None
+def bulk_data_error(data):
+    # A bulk request carries a JSON array of records
+    if data is None:
+        return "Payload is missing"
+    if not isinstance(data, list):
+        return "Payload must be a JSON array"
+    if not data:
+        return "Payload cannot be empty"
+    if len(data) > max_bulk_items:
+        return f"A bulk request cannot contain more than {max_bulk_items} records"
+    return None
+
+# Check if a bulk request asked for all-or-nothing inserts ('?atomic=false' disables it)
+def bulk_is_atomic(args):
+    return args.get('atomic', 'true').lower() not in ('false', '0', 'no')
+
+# Return the string values of 'field' in the records of a bulk request
+def bulk_values(data, field):
+    return [item[field] for item in data if isinstance(item, dict) and isinstance(item.get(field), str)]
+
+# Return the owner ids named by the records of a bulk task request
+def bulk_user_ids(data):
+    return {task_user_id(item) for item in data if isinstance(item, dict)} - {None}
+
+# Validate the users of a bulk request in one pass
+# 'taken_emails' and 'taken_phones' hold the case-folded values already in the store;
+# values used earlier in the batch are tracked as well
+# Returns the valid (position, fields) pairs and the per-item errors
+def check_bulk_users(data, taken_emails, taken_phones):
+    seen_emails = set()
+    seen_phones = set()
+    items = []
+    errors = []
+    for index, item in enumerate(data):
+        field_errors = validate_user_item(item)
+        if field_errors:
+            errors.append({'index': index, 'message': field_errors[0], 'errors': field_errors})
+            continue
+        email_key = index_key(item['email'])
+        phone_key = index_key(item['phone'])
+        if email_key in taken_emails or email_key in seen_emails:
+            errors.append({'index': index, 'message': duplicate_messages[('users', 'email')].format(item['email'])})
+            continue
+        if phone_key in taken_phones or phone_key in seen_phones:
+            errors.append({'index': index, 'message': duplicate_messages[('users', 'phone')].format(item['phone'])})
+            continue
+        seen_emails.add(email_key)
+        seen_phones.add(phone_key)
+        items.append((index, item))
+    return items, errors
+
+# Validate the tasks of a bulk request in one pass, like check_bulk_users
+# 'known_users' holds the ids of the owners that exist; every task shares 'created_at'
+def check_bulk_tasks(data, taken_titles, known_users, created_at):
+    seen_titles = set()
+    items = []
+    errors = []
+    for index, item in enumerate(data):
+        field_errors = validate_task_item(item)
+        if field_errors:
+            errors.append({'index': index, 'message': field_errors[0], 'errors': field_errors})
+            continue
+        user_id = task_user_id(item)
+        title_key = index_key(item['title'])
+        if user_id is not None and user_id not in known_users:
+            errors.append({'index': index, 'message': f"User with id {user_id} not found"})
+            continue
+        if title_key in taken_titles or title_key in seen_titles:
+            errors.append({'index': index, 'message': duplicate_messages[('tasks', 'title')].format(item['title'])})
+            continue
+        seen_titles.add(title_key)
+        items.append((index, new_task(item, user_id, created_at)))
+    return items, errors
+
+# Time the validation of a whole bulk request as one observation
+if metrics.enabled:
+    check_bulk_users = metrics.timed('validation', check_bulk_users)
+    check_bulk_tasks = metrics.timed('validation', check_bulk_tasks)
+
+# Return the response of a bulk request rejected as a whole, or None when it may go ahead
+def bulk_rejection(errors, atomic, label):
+    # In atomic mode any invalid record rejects the whole batch
+    if errors and atomic:
+        return bad_request_response(
+            f"No {label} were created: {len(errors)} of the records are invalid", {'errors': errors}
+        )
+    return None
+
+# Return one compact bulk response with the new IDs instead of the full records
+def bulk_created_response(ids, errors, label):
+    errors.sort(key=lambda item: item['index'])
+    return success_response(
+        f"{len(ids)} {label} created successfully",
+        {'created': len(ids), 'ids': ids, 'errors': errors},
+        201
+    )
+
+# Insert the valid records of a bulk request and build its response
+# 'items' pairs each record's position in the request with its fields
+# 'errors' holds the per-item errors found during validation
+def bulk_insert(items, errors, add_many, add_one, label):
+    atomic = bulk_is_atomic(request.args)
+    rejection = bulk_rejection(errors, atomic, label)
+    if rejection:
+        return rejection
+
+    ids = []
+    try:
+        # Insert everything in one step; the store rolls back if anything clashes
+        ids = [record.id for record in add_many([fields for _, fields in items])]
+    except DuplicateRecordError as error:
+        # Another request took one of the values after validation
+        message = duplicate_messages[(error.table, error.field)].format(error.value)
+        if atomic:
+            return bad_request_response(f"No {label} were created: {message}", {'errors': errors})
+        # Without atomicity, fall back to inserting the records one at a time
+        for index, fields in items:
+            try:
+                ids.append(add_one(fields).id)
+            except DuplicateRecordError as error:
+                errors.append({'index': index, 'message': duplicate_messages[(error.table, error.field)].format(error.value)})
+
+    return bulk_created_response(ids, errors, label)
+
 # Define an API endpoint for creating a new user
 # The route '/api/v1/user/add' listens for HTTP POST requests
-@app.route('/api/v1/user/add', methods=['POST'])
 def create_user():
-    # Use 'global' to access and modify the global 'next_user_id' variable
-    global next_user_id
-
     # Retrieve the incoming JSON data from the client request body
     data = request.get_json()
+    store = current_store()
 
-    # Validate that the JSON payload exists and is properly formatted
-    payload = validate_payload(data)
-    if payload:
-        # If validation fails, return a 400 Bad Request response with the error message
-        return bad_request_response(payload)
-
-    # Validate all required fields and check field lengths
-    # Each validation function returns an error message if validation fails
-    error = (validate_required_fields(data, 'firstName') or 
-             validate_required_fields(data, 'lastName') or 
-             validate_required_fields(data, 'email') or 
-             validate_required_fields(data, 'phone') or 
-             validate_field_length(data, 'firstName') or 
-             validate_field_length(data, 'lastName'))
-    if error:
-        # If any required field or length check fails, return a 400 Bad Request
-        return bad_request_response(error)
-
-    # Validate that the provided email has a valid format
-    if not validate_email(data['email']):
-        return bad_request_response("Invalid email format")
-    
-    # Validate the phone number for correct format, length, and prefix
-    if not validate_phone(data['phone']):
-        return bad_request_response(
-            "Phone number must be numeric and at least 11 digits long "
-            "starting with a valid prefix (070, 080, 090, 081, 091)"
-        )
+    # Validate the payload, its required fields, and the email and phone formats
+    errors = validate_user_data(data)
+    if errors:
+        # If validation fails, return a 400 Bad Request response with the first error message
+        # and every field error in 'data'
+        return bad_request_response(errors[0], {'errors': errors})
     
     # Ensure the provided email address is unique among existing users
-    if not validate_unique_field(users, 'email', data['email']):
-        return bad_request_response(f"User with email '{data['email']}' already exists")
+    if not store.is_unique('users', 'email', data['email']):
+        return bad_request_response(duplicate_messages[('users', 'email')].format(data['email']))
     
     # Ensure the provided phone number is unique among existing users
-    if not validate_unique_field(users, 'phone', data['phone']):
-        return bad_request_response(f"User with phone number '{data['phone']}' already exists")
+    if not store.is_unique('users', 'phone', data['phone']):
+        return bad_request_response(duplicate_messages[('users', 'phone')].format(data['phone']))
     
-    # Create a new user dictionary with validated input data
-    user = {
-        'id': next_user_id,
-        'firstName': data['firstName'],
-        'lastName': data['lastName'],
-        'email': data['email'],
-        'phone': data['phone']
-    }
-    
-    # Add the new user record to the 'users' dictionary using the next available ID
-    users[next_user_id] = user
-
-    # Increment the user ID counter for the next new user
-    next_user_id += 1
+    # Add the new user to the store, which assigns the next available ID
+    # The store re-checks uniqueness, so a record created in the meantime is still rejected
+    try:
+        user = store.add_user(data)
+    except DuplicateRecordError as error:
+        return bad_request_response(duplicate_messages[(error.table, error.field)].format(error.value))
     
     # Return a success response with formatted user data and HTTP 201 (Created)
-    return success_response("User created successfully", format_response(user, 'user'), 201)
+    return success_response("User created successfully", response_data(user, 'user'), 201)
 
 
 # Define an endpoint to create a new task
-@app.route('/api/v1/task/add', methods=['POST'])
 def create_task():
-    # Use the global variable 'next_task_id' to assign unique task IDs
-    global next_task_id
-
     # Extract JSON data from the incoming POST request
     data = request.get_json()
+    store = current_store()
 
-    # Validate that the payload exists and is a proper JSON object
-    payload = validate_payload(data)
-    if payload:
+    # Validate that the payload is a proper JSON object with the required fields
+    # and that duration is a positive integer
+    errors = validate_task_data(data)
+    if errors:
         # If validation fails, return a bad request response
-        return bad_request_response(payload)
-    
-    # Validate required fields: title, description, and duration
-    # Also ensure the title meets minimum length requirements
-    error = (
-        validate_required_fields(data, 'title') or 
-        validate_required_fields(data, 'description') or 
-        validate_required_fields(data, 'duration') or 
-        validate_field_length(data, 'title')
-    )
-    if error:
-        return bad_request_response(error)
+        return bad_request_response(errors[0], {'errors': errors})
     
     # Optionally assign the task to an existing user if 'user_id' is provided
-    user_id = None
-    if 'user_id' in data and isinstance(data['user_id'], int) and data['user_id'] > 0:
-        user_id = data['user_id']
+    user_id = task_user_id(data)
+    if user_id is not None:
         # Check if the provided user exists
-        if user_id not in users:
+        if not store.has_user(user_id):
             return not_found_response(f"User with id {user_id} not found")
     
     # Ensure task title is unique to avoid duplicates
-    if not validate_unique_field(tasks, 'title', data['title']):
-        return bad_request_response(f"Task with title '{data['title']}' already exists")
-   
-    # Validate that duration is a positive integer and at least 5 minutes
-    if not positive_integer(data['duration']):
-        return bad_request_response(
-            "Duration must be a positive integer representing minutes, "
-            "and must not be less than 5 minutes"
-        )
+    if not store.is_unique('tasks', 'title', data['title']):
+        return bad_request_response(duplicate_messages[('tasks', 'title')].format(data['title']))
     
-    # Create a new task record
-    task = {
-        'id': next_task_id,
-        'user_id': user_id,
-        'title': data['title'],
-        'description': data['description'],
-        'status': 'pending',
-        'duration': data['duration'],
-        'created_at': datetime.now(timezone.utc).isoformat(),
-        'updated_at': None,
-        'completed_at': None
-    }
+    # Create a new task record (the store assigns its ID)
+    task = new_task(data, user_id, datetime.now(timezone.utc))
     
-    # Store the task and increment the task counter
-    tasks[next_task_id] = task
-    next_task_id += 1
+    # Store the task
+    try:
+        task = store.add_task(task)
+    except DuplicateRecordError as error:
+        return bad_request_response(duplicate_messages[(error.table, error.field)].format(error.value))
     
     # Return a success response with the newly created task
-    return success_response("Task created successfully", format_response(task, 'task'), 201)
+    return success_response("Task created successfully", response_data(task, 'task'), 201)
 
 # Define an endpoint to update or mark the status of an existing task
-@app.route('/api/v1/task/<int:task_id>/status/update', methods=['PUT'])
 def mark_task_as_completed(task_id):
     # Get JSON data from the request body
     data = request.get_json()
-
-    # Define allowed task statuses
-    allowed_statuses = ['pending', 'in-progress', 'completed']
+    store = current_store()
 
     # Retrieve the task by its ID
-    task = tasks.get(task_id)
+    task = store.get_task(task_id)
 
     # Check if the request contains a 'status' field
     if not data or 'status' not in data:
@@ -204,24 +388,357 @@ def mark_task_as_completed(task_id):
         return not_found_response(f"Task with id {task_id} not found")
     
     # Prevent changes if the task is already marked as completed
-    if task['status'] == 'completed':
+    if task.status == 'completed':
         return bad_request_response(f"Task with id {task_id} is already marked as completed")
 
-    # Update the task status
-    task['status'] = data['status']
-    
-    # Record completion time only when task is marked as "completed"
-    if data['status'] == 'completed':
-        task['completed_at'] = datetime.now(timezone.utc).isoformat()
-    
-    # Update the 'updated_at' timestamp for all status changes
-    task['updated_at'] = datetime.now(timezone.utc).isoformat()
+    # Update the task status, with one timestamp for 'updated_at' and 'completed_at'
+    changes = status_changes(data['status'], datetime.now(timezone.utc))
 
-    # Save the updated task back into the dictionary
-    tasks[task_id] = task
+    # Save the changes back into the store
+    # The store re-checks the completed status atomically, so a concurrent completion is still refused
+    try:
+        task = store.update_task(task_id, changes)
+    except TaskCompletedError as error:
+        return bad_request_response(str(error))
+    if task is None:
+        return not_found_response(f"Task with id {task_id} not found")
+
+    # The cached copy of the task is out of date now
+    current_record_cache().discard(('tasks', task_id))
 
     # Return a success response with the updated task details
     return success_response(
         f"Task with id {task_id} marked as {data['status']} successfully",
-        format_response(task, 'task')
+        response_data(task, 'task')
+    )
+
+# Return the encoded 'data' of version 'version' of a record from 'cache', or None
+def cached_record_data(cache, table, record_id, version):
+    entry = cache.get((table, record_id))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    return None
+
+# Encode the 'data' of a record, remember it in 'cache' and return it
+def cache_record_data(cache, table, record, version, data_type):
+    data = serializer.dumps(response_data(record, data_type))
+    cache.put((table, record.id), (version, data))
+    return data
+
+# Build the response of a read endpoint from the encoded record 'data'
+# Clients should revalidate every time ('no-cache'), which costs them a 304 when nothing changed
+def record_response(data, etag, label):
+    return Response(
+        serializer.encode_envelope_bytes('success', f"{label} retrieved successfully", data),
+        mimetype='application/json',
+        headers={'ETag': etag, 'Cache-Control': 'no-cache'}
+    )
+
+# Serve one record of 'table' with ETag / If-None-Match support
+def read_record(table, record_id, data_type, label):
+    # An unchanged poll only needs the version (a dict lookup for the memory store)
+    store = current_store()
+    version = store.version(table, record_id)
+    if version is None:
+        return not_found_response(f"{label} with id {record_id} not found")
+    etag = make_etag(store.epoch, table, record_id, version)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers={'ETag': etag})
+
+    # Serve the encoded record from the cache, or encode it once and cache it
+    cache = current_record_cache()
+    data = cached_record_data(cache, table, record_id, version)
+    if data is None:
+        # Read the record and its version together, so the body always matches its ETag
+        record, version = store.get_versioned(table, record_id)
+        if record is None:
+            return not_found_response(f"{label} with id {record_id} not found")
+        data = cache_record_data(cache, table, record, version, data_type)
+        etag = make_etag(store.epoch, table, record_id, version)
+    return record_response(data, etag, label)
+
+# Define an endpoint to read one task
+# Send the ETag of the last response in 'If-None-Match' to get an empty 304 while it is unchanged
+def get_task(task_id):
+    return read_record('tasks', task_id, 'task', "Task")
+
+# Define an endpoint to read one user (with the same ETag support as tasks)
+def get_user(user_id):
+    return read_record('users', user_id, 'user', "User")
+
+# Define an endpoint to read a user's task aggregates
+# The store keeps them up to date on every task change, so this never scans the tasks
+def get_user_stats(user_id):
+    store = current_store()
+    if not store.has_user(user_id):
+        return not_found_response(f"User with id {user_id} not found")
+    return success_response("User stats retrieved successfully", format_stats(user_id, store.user_stats(user_id)))
+
+# Build the changes of a status transition made at 'now'
+def status_changes(status, now):
+    # Update the 'updated_at' timestamp for all status changes
+    changes = {'status': status, 'updated_at': now}
+    # Record completion time only when task is marked as "completed"
+    if status == 'completed':
+        changes['completed_at'] = now
+    return changes
+
+# Check the items of a batch status request
+# Returns the valid (position, task_id, changes) updates, which all share the timestamp 'now',
+# and the results of the invalid items
+def check_status_batch(data, now):
+    updates = []
+    results = []
+    for index, item in enumerate(data):
+        task_id = item.get('id') if isinstance(item, dict) else None
+        # The same rules as the single endpoint, applied to each item
+        if not isinstance(task_id, int) or isinstance(task_id, bool) or not 1 <= task_id <= MAX_INT64:
+            results.append({'index': index, 'id': task_id, 'code': 400, 'message': "id must be a positive integer"})
+        elif 'status' not in item:
+            results.append({'index': index, 'id': task_id, 'code': 400, 'message': "status field is required"})
+        elif item['status'] not in allowed_statuses:
+            results.append({'index': index, 'id': task_id, 'code': 400,
+                            'message': "Invalid task status. Allowed values are: pending, in-progress, completed"})
+        else:
+            updates.append((index, task_id, status_changes(item['status'], now)))
+    return updates, results
+
+# Build the response of a batch status request from the store's 'outcomes' (see Store.update_tasks)
+# and drop the changed tasks from the record cache 'cache'
+def status_batch_response(updates, outcomes, results, cache):
+    updated = 0
+    for (index, task_id, changes), outcome in zip(updates, outcomes):
+        # Changed tasks must not be served from the cache any more
+        if outcome is not None and not isinstance(outcome, TaskCompletedError):
+            cache.discard(('tasks', task_id))
+        if outcome is None:
+            results.append({'index': index, 'id': task_id, 'code': 404, 'message': f"Task with id {task_id} not found"})
+        elif isinstance(outcome, TaskCompletedError):
+            results.append({'index': index, 'id': task_id, 'code': 400, 'message': str(outcome)})
+        else:
+            results.append({'index': index, 'id': task_id, 'code': 200, 'status': changes['status']})
+            updated += 1
+    results.sort(key=lambda item: item['index'])
+    return success_response(f"{updated} tasks updated successfully", {'updated': updated, 'results': results})
+
+# Define an endpoint to change the status of many tasks in one request
+# The body is a JSON array of {"id": ..., "status": ...} objects; every item follows the
+# rules of the single endpoint on its own, and the response reports each item's result
+def update_task_statuses():
+    # Extract the JSON array from the request body
+    data = request.get_json(silent=True)
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+
+    # Every transition in the batch shares one timestamp
+    updates, results = check_status_batch(data, datetime.now(timezone.utc))
+    outcomes = current_store().update_tasks([(task_id, changes) for _, task_id, changes in updates])
+    return status_batch_response(updates, outcomes, results, current_record_cache())
+
+# Read an optional integer query parameter from 'args'
+# Returns (value, None) on success or (None, error message) when it is not an integer
+# between 'min' and 'max' (by default the largest integer a record can hold)
+def int_query_arg(args, name, default, min=0, max=MAX_INT64):
+    value = args.get(name)
+    if value is None or value == '':
+        return default, None
+    # isdecimal, not isdigit: isdigit also accepts characters such as '²' that int() rejects
+    if not value.isdecimal() or not min <= int(value) <= max:
+        return None, f"{name} must be an integer between {min} and {max}"
+    return int(value), None
+
+# Read the filters and pagination parameters of the task listing from 'args'
+# Returns ((status, user_id, cursor, limit), None) or (None, error message)
+def list_query(args):
+    # Validate the status filter against the allowed statuses
+    status = args.get('status') or None
+    if status is not None and status not in allowed_statuses:
+        return None, "Invalid task status. Allowed values are: pending, in-progress, completed"
+
+    # Validate the numeric query parameters
+    user_id, error = int_query_arg(args, 'user_id', None, 1)
+    if error:
+        return None, error
+    limit, error = int_query_arg(args, 'limit', default_page_size, 1)
+    if error:
+        return None, error
+    cursor, error = int_query_arg(args, 'cursor', 0)
+    if error:
+        return None, error
+    return (status, user_id, cursor, min(limit, max_page_size)), None
+
+# Build the listing response from a page fetched with one extra task,
+# which tells whether another page follows
+def list_response(page, limit):
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+    return success_response(
+        "Tasks retrieved successfully",
+        {'tasks': response_data(page[:limit], 'tasks'), 'next_cursor': next_cursor}
     )
+
+
+# Define an endpoint to list tasks, newest last, one page at a time
+# Optional filters: '?status=' and '?user_id='
+# Pagination: '?limit=' (1-100) and '?cursor=' (the 'next_cursor' of the previous page)
+def list_tasks():
+    query, error = list_query(request.args)
+    if error:
+        return bad_request_response(error)
+    status, user_id, cursor, limit = query
+
+    # Fetch one extra task to learn whether another page follows
+    page = current_store().list_tasks(status, user_id, cursor, limit + 1)
+    return list_response(page, limit)
+
+
+# Return the NDJSON export body of 'table' in 'store' and its headers
+# The body is produced record by record while it is sent, and it is gzipped when the
+# 'Accept-Encoding' header gives gzip a non-zero quality ('gzip;q=0' refuses it)
+def export_stream(store, table, data_type, accept_encoding):
+    body = ndjson_stream(store.export(table), data_type)
+    # The body depends on Accept-Encoding either way, so caches must key on it
+    headers = {'Content-Disposition': f'attachment; filename="{table}.ndjson"', 'Vary': 'Accept-Encoding'}
+    if parse_accept_header(accept_encoding)['gzip'] > 0:
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    return body, headers
+
+# Build a streaming NDJSON response with every record of 'table'
+def export_response(table, data_type):
+    body, headers = export_stream(current_store(), table, data_type, request.headers.get('Accept-Encoding', ''))
+    return Response(body, mimetype='application/x-ndjson', headers=headers)
+
+
+# Define an endpoint to export every task as newline-delimited JSON
+def export_tasks():
+    return export_response('tasks', 'task')
+
+
+# Define an endpoint to export every user as newline-delimited JSON
+def export_users():
+    return export_response('users', 'user')
+
+
+# Define an endpoint to create many users in one request
+# The body is a JSON array of user objects; '?atomic=false' inserts the valid ones
+# and reports the rest instead of rejecting the whole batch
+def create_users_bulk():
+    # Extract the JSON array from the request body
+    data = request.get_json(silent=True)
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+    store = current_store()
+
+    # Case-folded emails and phones that already exist in the store, found with one set lookup each
+    taken_emails = store.existing_keys('users', 'email', bulk_values(data, 'email'))
+    taken_phones = store.existing_keys('users', 'phone', bulk_values(data, 'phone'))
+
+    # Validate every record in one pass
+    items, errors = check_bulk_users(data, taken_emails, taken_phones)
+    return bulk_insert(items, errors, store.add_users, store.add_user, 'users')
+
+
+# Define an endpoint to create many tasks in one request
+# The body is a JSON array of task objects; '?atomic=false' works as for users
+def create_tasks_bulk():
+    # Extract the JSON array from the request body
+    data = request.get_json(silent=True)
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+    store = current_store()
+
+    # Look up existing titles and owners for the whole batch at once
+    taken_titles = store.existing_keys('tasks', 'title', bulk_values(data, 'title'))
+    known_users = store.existing_user_ids(bulk_user_ids(data))
+
+    # Validate every record in one pass; every task in the batch shares one creation timestamp
+    items, errors = check_bulk_tasks(data, taken_titles, known_users, datetime.now(timezone.utc))
+    return bulk_insert(items, errors, store.add_tasks, store.add_task, 'tasks')
+
+
+# Define an endpoint that exposes request timings, store sizes and index counters
+# in the Prometheus text format
+def show_metrics():
+    return Response(metrics.render(current_store()), mimetype='text/plain; version=0.0.4')
+
+
+# Record ids in paths: integers up to MAX_INT64, so a larger id is a plain 404
+class IdConverter(IntegerConverter):
+    def __init__(self, map):
+        super().__init__(map, max=MAX_INT64)
+
+# Routes: (path, method, view function), registered on the app by create_app
+# ('<id:...>' is IdConverter)
+routes = [
+    ('/api/v1/user/add', 'POST', create_user),
+    ('/api/v1/task/add', 'POST', create_task),
+    ('/api/v1/task/<id:task_id>/status/update', 'PUT', mark_task_as_completed),
+    ('/api/v1/task/<id:task_id>', 'GET', get_task),
+    ('/api/v1/user/<id:user_id>', 'GET', get_user),
+    ('/api/v1/user/<id:user_id>/stats', 'GET', get_user_stats),
+    ('/api/v1/tasks/status', 'PUT', update_task_statuses),
+    ('/api/v1/tasks', 'GET', list_tasks),
+    ('/api/v1/tasks/export', 'GET', export_tasks),
+    ('/api/v1/users/export', 'GET', export_users),
+    ('/api/v1/user/bulk', 'POST', create_users_bulk),
+    ('/api/v1/task/bulk', 'POST', create_tasks_bulk),
+    ('/metrics', 'GET', show_metrics),
+]
+
+
+# Time the uniqueness checks of 'store' when TASK_MANAGER_METRICS is set, and return it
+def instrument_store(store):
+    if metrics.enabled:
+        store.is_unique = metrics.timed('uniqueness', store.is_unique)
+        store.existing_keys = metrics.timed('uniqueness', store.existing_keys)
+    return store
+
+
+# Build the Flask application (the application factory)
+# A worker builds one app at startup, e.g. gunicorn 'taskManagerApp:create_app()'.
+# Every app owns its store and record cache, kept in app.extensions: 'store' is used
+# instead of the one selected by the environment (handy for benchmarks).
+# TASK_MANAGER_STORAGE selects that backend: 'memory' (default) or 'sqlite'
+# (TASK_MANAGER_DATABASE names the SQLite file shared by every worker)
+def create_app(store=None):
+    # Initialize a Flask application instance
+    # '__name__' tells Flask where to find resources like templates and static files
+    app = Flask(__name__)
+    app.url_map.converters['id'] = IdConverter
+    app.extensions['store'] = instrument_store(store if store is not None else create_store())
+    # Encoded 'data' of recently read records, as (version, bytes) keyed by (table, id)
+    # TASK_MANAGER_RESPONSE_CACHE sets how many records it keeps (0 turns it off)
+    app.extensions['record_cache'] = LRUCache(int(os.environ.get('TASK_MANAGER_RESPONSE_CACHE', '10000')))
+
+    # Encode JSON responses with orjson/msgspec when one is installed
+    # (TASK_MANAGER_SERIALIZER=json keeps Flask's standard encoder)
+    if serializer.backend != 'json':
+        app.json = FastJSONProvider(app)
+
+    for path, method, view in routes:
+        app.add_url_rule(path, view_func=view, methods=[method])
+
+    if metrics.enabled:
+        app.json.loads = metrics.timed('json_parse', app.json.loads)
+        app.json.response = metrics.timed('serialize', app.json.response)
+    if metrics.enabled or metrics.profiler:
+        app.before_request(start_request_timer)
+        app.after_request(record_request_time)
+    return app
+
+
+# Build the default 'app' the first time something asks for it, so 'flask run',
+# 'gunicorn taskManagerApp:app' and 'from taskManagerApp import app' keep working;
+# 'store' and 'record_cache' are the ones of that app
+def __getattr__(name):
+    global app
+    if name == 'app':
+        app = create_app()
+        return app
+    if name in ('store', 'record_cache'):
+        default_app = globals().get('app') or __getattr__('app')
+        return default_app.extensions[name]
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
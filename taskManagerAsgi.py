@@ -0,0 +1,418 @@
+# Async (ASGI) serving mode for the task API
+# The same endpoints as taskManagerApp.py, written as coroutines, so one event loop can hold
+# thousands of slow client connections instead of tying up a worker thread per request.
+# Validation, response building and the store itself are shared with the Flask app;
+# store calls go through AsyncStore, which runs SQLite calls in worker threads.
+#
+# Run it with any ASGI server, for example:
+#   uvicorn taskManagerAsgi:app --workers 4
+# (with more than one worker, use TASK_MANAGER_STORAGE=sqlite so every worker sees the same data)
+
+# Import re to match the routes, parse_qsl to read query strings and time to time requests
+import re
+import time
+from urllib.parse import parse_qsl
+
+# Import the datetime class and timezone object to timestamp task records
+from datetime import datetime, timezone
+
+# Import the response serializer and the request metrics
+from utils import serializer
+from utils import metrics
+
+# Import the awaitable store wrapper
+from utils.async_store import AsyncStore
+from utils.storage import DuplicateRecordError, TaskCompletedError
+from utils.stats import format_stats
+
+# Import the response helper functions
+from utils.response import (
+    make_response,
+    success_response,
+    bad_request_response,
+    not_found_response,
+    response_data,
+    make_etag,
+    etag_matches
+)
+
+# Reuse the store, validators and request helpers of the Flask app,
+# so both serving modes behave the same and share one set of records
+import taskManagerApp as shared
+from taskManagerApp import (
+    duplicate_messages,
+    allowed_statuses,
+    validate_user_data,
+    validate_task_data,
+    task_user_id,
+    new_task,
+    bulk_data_error,
+    bulk_is_atomic,
+    bulk_values,
+    bulk_user_ids,
+    check_bulk_users,
+    check_bulk_tasks,
+    bulk_rejection,
+    bulk_created_response,
+    status_changes,
+    check_status_batch,
+    status_batch_response,
+    list_query,
+    list_response,
+    cached_record_data,
+    cache_record_data,
+    export_stream,
+    MAX_INT64
+)
+
+# The store and record cache of the Flask app's default 'app', the store with awaitable methods
+record_cache = shared.record_cache
+store = AsyncStore(shared.store)
+
+
+# Parse a JSON request body; an empty or malformed body gives None
+def parse_json(body):
+    if not body:
+        return None
+    try:
+        return serializer.loads(body)
+    except ValueError:
+        return None
+
+
+# Define an endpoint for creating a new user
+async def create_user(request):
+    data = parse_json(request['body'])
+
+    # Validate the payload, its required fields, and the email and phone formats
+    errors = validate_user_data(data)
+    if errors:
+        return bad_request_response(errors[0], {'errors': errors})
+
+    # Ensure the email address and phone number are not taken yet
+    if not await store.is_unique('users', 'email', data['email']):
+        return bad_request_response(duplicate_messages[('users', 'email')].format(data['email']))
+    if not await store.is_unique('users', 'phone', data['phone']):
+        return bad_request_response(duplicate_messages[('users', 'phone')].format(data['phone']))
+
+    # The store re-checks uniqueness, so a record created in the meantime is still rejected
+    try:
+        user = await store.add_user(data)
+    except DuplicateRecordError as error:
+        return bad_request_response(duplicate_messages[(error.table, error.field)].format(error.value))
+
+    return success_response("User created successfully", response_data(user, 'user'), 201)
+
+
+# Define an endpoint to create a new task
+async def create_task(request):
+    data = parse_json(request['body'])
+
+    # Validate the required fields and the duration
+    errors = validate_task_data(data)
+    if errors:
+        return bad_request_response(errors[0], {'errors': errors})
+
+    # Optionally assign the task to an existing user
+    user_id = task_user_id(data)
+    if user_id is not None and not await store.has_user(user_id):
+        return not_found_response(f"User with id {user_id} not found")
+
+    # Ensure task title is unique to avoid duplicates
+    if not await store.is_unique('tasks', 'title', data['title']):
+        return bad_request_response(duplicate_messages[('tasks', 'title')].format(data['title']))
+
+    try:
+        task = await store.add_task(new_task(data, user_id, datetime.now(timezone.utc)))
+    except DuplicateRecordError as error:
+        return bad_request_response(duplicate_messages[(error.table, error.field)].format(error.value))
+
+    return success_response("Task created successfully", response_data(task, 'task'), 201)
+
+
+# Define an endpoint to update or mark the status of an existing task
+async def mark_task_as_completed(request, task_id):
+    data = parse_json(request['body'])
+
+    # Check the 'status' field before touching the store
+    if not isinstance(data, dict) or 'status' not in data:
+        return bad_request_response("status field is required")
+    if data['status'] not in allowed_statuses:
+        return bad_request_response("Invalid task status. Allowed values are: pending, in-progress, completed")
+
+    # One timestamp for 'updated_at' and, on completion, 'completed_at'
+    changes = status_changes(data['status'], datetime.now(timezone.utc))
+
+    # The store refuses the change atomically once the task is completed
+    try:
+        task = await store.update_task(task_id, changes)
+    except TaskCompletedError as error:
+        return bad_request_response(str(error))
+    if task is None:
+        return not_found_response(f"Task with id {task_id} not found")
+
+    # The cached copy of the task is out of date now
+    record_cache.discard(('tasks', task_id))
+
+    return success_response(
+        f"Task with id {task_id} marked as {data['status']} successfully",
+        response_data(task, 'task')
+    )
+
+
+# Define an endpoint to change the status of many tasks in one request
+async def update_task_statuses(request):
+    data = parse_json(request['body'])
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+
+    # Every transition in the batch shares one timestamp
+    updates, results = check_status_batch(data, datetime.now(timezone.utc))
+    outcomes = await store.update_tasks([(task_id, changes) for _, task_id, changes in updates])
+    return status_batch_response(updates, outcomes, results, record_cache)
+
+
+# Define an endpoint to list tasks, one page at a time (see taskManagerApp.list_tasks)
+async def list_tasks(request):
+    query, error = list_query(request['args'])
+    if error:
+        return bad_request_response(error)
+    status, user_id, cursor, limit = query
+
+    # Fetch one extra task to learn whether another page follows
+    page = await store.list_tasks(status, user_id, cursor, limit + 1)
+    return list_response(page, limit)
+
+
+# Define an endpoint to read a user's task aggregates
+async def get_user_stats(request, user_id):
+    if not await store.has_user(user_id):
+        return not_found_response(f"User with id {user_id} not found")
+    stats = await store.user_stats(user_id)
+    return success_response("User stats retrieved successfully", format_stats(user_id, stats))
+
+
+# Insert the valid records of a bulk request and build its response (see taskManagerApp.bulk_insert)
+async def bulk_insert(request, items, errors, add_many, add_one, label):
+    atomic = bulk_is_atomic(request['args'])
+    rejection = bulk_rejection(errors, atomic, label)
+    if rejection:
+        return rejection
+
+    ids = []
+    try:
+        ids = [record.id for record in await add_many([fields for _, fields in items])]
+    except DuplicateRecordError as error:
+        # Another request took one of the values after validation
+        message = duplicate_messages[(error.table, error.field)].format(error.value)
+        if atomic:
+            return bad_request_response(f"No {label} were created: {message}", {'errors': errors})
+        # Without atomicity, fall back to inserting the records one at a time
+        for index, fields in items:
+            try:
+                ids.append((await add_one(fields)).id)
+            except DuplicateRecordError as error:
+                errors.append({'index': index, 'message': duplicate_messages[(error.table, error.field)].format(error.value)})
+
+    return bulk_created_response(ids, errors, label)
+
+
+# Define an endpoint to create many users in one request
+async def create_users_bulk(request):
+    data = parse_json(request['body'])
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+
+    taken_emails = await store.existing_keys('users', 'email', bulk_values(data, 'email'))
+    taken_phones = await store.existing_keys('users', 'phone', bulk_values(data, 'phone'))
+    items, errors = check_bulk_users(data, taken_emails, taken_phones)
+    return await bulk_insert(request, items, errors, store.add_users, store.add_user, 'users')
+
+
+# Define an endpoint to create many tasks in one request
+async def create_tasks_bulk(request):
+    data = parse_json(request['body'])
+    error = bulk_data_error(data)
+    if error:
+        return bad_request_response(error)
+
+    taken_titles = await store.existing_keys('tasks', 'title', bulk_values(data, 'title'))
+    known_users = await store.existing_user_ids(bulk_user_ids(data))
+    items, errors = check_bulk_tasks(data, taken_titles, known_users, datetime.now(timezone.utc))
+    return await bulk_insert(request, items, errors, store.add_tasks, store.add_task, 'tasks')
+
+
+# Stream every record of 'table' as newline-delimited JSON
+async def send_export(request, send, table, data_type):
+    body, headers = export_stream(store.store, table, data_type, request['headers'].get('accept-encoding', ''))
+    headers['Content-Type'] = 'application/x-ndjson'
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()]
+    })
+    # Each block is pulled through the store wrapper, so SQLite reads don't block the loop
+    while True:
+        block = await store.next(body)
+        if block is None:
+            break
+        await send({'type': 'http.response.body', 'body': block, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def export_tasks(request, send):
+    await send_export(request, send, 'tasks', 'task')
+
+
+async def export_users(request, send):
+    await send_export(request, send, 'users', 'user')
+
+
+# Serve one record of 'table' with ETag / If-None-Match support (see taskManagerApp.read_record)
+async def send_record(request, send, table, record_id, data_type, label):
+    version = await store.version(table, record_id)
+    if version is None:
+        return await send_json(send, *not_found_response(f"{label} with id {record_id} not found"))
+    etag = make_etag(store.store.epoch, table, record_id, version)
+    if etag_matches(request['headers'].get('if-none-match'), etag):
+        return await send_bytes(send, 304, b'', [(b'etag', etag.encode())])
+
+    data = cached_record_data(record_cache, table, record_id, version)
+    if data is None:
+        record, version = await store.get_versioned(table, record_id)
+        if record is None:
+            return await send_json(send, *not_found_response(f"{label} with id {record_id} not found"))
+        data = cache_record_data(record_cache, table, record, version, data_type)
+        etag = make_etag(store.store.epoch, table, record_id, version)
+    body = serializer.encode_envelope_bytes('success', f"{label} retrieved successfully", data)
+    await send_bytes(send, 200, body, [
+        (b'content-type', b'application/json'), (b'etag', etag.encode()), (b'cache-control', b'no-cache')
+    ])
+
+
+async def get_task(request, send, task_id):
+    await send_record(request, send, 'tasks', task_id, 'task', "Task")
+
+
+async def get_user(request, send, user_id):
+    await send_record(request, send, 'users', user_id, 'user', "User")
+
+
+# Send the Prometheus metrics of the app and the store (see utils/metrics.py)
+# The slow-request profiler samples threads, so it does not apply to coroutines here
+async def show_metrics(request, send):
+    payload = (await store.run(metrics.render, store.store)).encode()
+    await send_bytes(send, 200, payload, [(b'content-type', b'text/plain; version=0.0.4')])
+
+
+# Routes: (method, path pattern, handler)
+# JSON handlers return (body, code); streaming handlers write to 'send' themselves
+routes = [
+    ('POST', re.compile(r'^/api/v1/user/add$'), create_user),
+    ('POST', re.compile(r'^/api/v1/task/add$'), create_task),
+    ('PUT', re.compile(r'^/api/v1/task/(\d+)/status/update$'), mark_task_as_completed),
+    ('PUT', re.compile(r'^/api/v1/tasks/status$'), update_task_statuses),
+    ('GET', re.compile(r'^/api/v1/tasks$'), list_tasks),
+    ('GET', re.compile(r'^/api/v1/user/(\d+)/stats$'), get_user_stats),
+    ('POST', re.compile(r'^/api/v1/user/bulk$'), create_users_bulk),
+    ('POST', re.compile(r'^/api/v1/task/bulk$'), create_tasks_bulk),
+]
+streaming_routes = [
+    ('GET', re.compile(r'^/api/v1/tasks/export$'), export_tasks),
+    ('GET', re.compile(r'^/api/v1/users/export$'), export_users),
+    ('GET', re.compile(r'^/metrics$'), show_metrics),
+    ('GET', re.compile(r'^/api/v1/task/(\d+)$'), get_task),
+    ('GET', re.compile(r'^/api/v1/user/(\d+)$'), get_user),
+]
+
+
+# Return the handler for 'method' and 'path' with the integer path parameters,
+# or (None, None, allowed) when nothing matches ('allowed' is True if only the method was wrong)
+# Ids above MAX_INT64 match nothing, like the Flask app's IdConverter
+def find_route(route_table, method, path):
+    allowed = False
+    for route_method, pattern, handler in route_table:
+        match = pattern.match(path)
+        if match and all(int(value) <= MAX_INT64 for value in match.groups()):
+            if route_method == method:
+                return handler, [int(value) for value in match.groups()], False
+            allowed = True
+    return None, None, allowed
+
+
+# Send a complete response with 'payload' as the body
+async def send_bytes(send, code, payload, headers):
+    await send({
+        'type': 'http.response.start',
+        'status': code,
+        'headers': headers + [(b'content-length', str(len(payload)).encode())]
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+# Send a JSON response
+async def send_json(send, body, code):
+    await send_bytes(send, code, serializer.dumps(body), [(b'content-type', b'application/json')])
+
+
+# Read the whole request body, which may arrive in several messages
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+# Answer the ASGI lifespan events (close the store on shutdown)
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await store.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+# The ASGI application
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path']
+    request = {
+        'args': dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))),
+        'headers': {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']},
+        'body': b''
+    }
+
+    handler, params, wrong_method = find_route(streaming_routes, method, path)
+    if handler is not None:
+        return await handler(request, send, *params)
+
+    handler, params, allowed = find_route(routes, method, path)
+    wrong_method = wrong_method or allowed
+    if handler is None:
+        if wrong_method:
+            return await send_json(send, *make_response("error", "Method not allowed", None, 405))
+        return await send_json(send, *not_found_response())
+
+    # The body is read without holding a thread, however slowly the client sends it
+    start = time.perf_counter()
+    request['body'] = await read_body(receive)
+    if request['body'] is None:
+        return
+    body, code = await handler(request, *params)
+    await send_json(send, body, code)
+    if metrics.enabled:
+        metrics.observe_request(handler.__name__, time.perf_counter() - start)
@@ -0,0 +1,254 @@
+# Cold tier for the completed tasks of the in-memory store
+# Completed tasks never change again, so once they are older than a configurable age a
+# background thread moves them out of the store's dictionaries and indexes into this tier.
+# The hot store then only holds open tasks and recently completed ones, so its memory and
+# index sizes stay bounded under steady load instead of growing with history.
+#
+# Archived tasks can still be read by id, listed and exported, and their titles stay taken:
+# an in-memory Bloom filter answers "this title was never archived" without touching disk,
+# and only its rare "maybe" is confirmed against the on-disk index.
+#
+# Files in the archive directory:
+#   tasks.log    append-only, one task per line in the journal's ["t", ...] format
+#   index.db     SQLite index of the log: id -> (position, length, user id, title key, version)
+# The log is written and fsynced before the index row makes a task visible here, and only
+# then is it removed from the hot store. Use it together with TASK_MANAGER_JOURNAL, which
+# keeps the users and the open tasks across restarts.
+import atexit
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from utils import serializer
+from utils.indexes import BloomFilter, index_key
+from utils.entries import task_entry, task_from_entry
+
+LOG_NAME = 'tasks.log'
+INDEX_NAME = 'index.db'
+ARCHIVE_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS archived (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER,
+        title_key TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        length INTEGER NOT NULL
+    )''',
+    'CREATE INDEX IF NOT EXISTS archived_title ON archived (title_key)',
+    'CREATE INDEX IF NOT EXISTS archived_user ON archived (user_id, id)',
+)
+ARCHIVE_INSERT = (
+    'INSERT OR REPLACE INTO archived (id, user_id, title_key, version, position, length) VALUES (?, ?, ?, ?, ?, ?)'
+)
+ARCHIVE_LOCATION = 'SELECT position, length, version FROM archived WHERE id = ?'
+ARCHIVE_HAS_TITLE = 'SELECT 1 FROM archived WHERE title_key = ? LIMIT 1'
+ARCHIVE_TITLES = 'SELECT title_key FROM archived WHERE title_key IN ({})'
+ARCHIVE_IDS = 'SELECT id FROM archived WHERE id IN ({})'
+# Largest number of '?' placeholders used in one IN (...) query
+ARCHIVE_MAX_PARAMETERS = 500
+# The Bloom filter starts with room for this many titles and doubles when it fills up
+BLOOM_CAPACITY = 100000
+
+
+class ColdStore:
+    def __init__(self, directory, error_rate=0.01):
+        self.directory = directory
+        self.error_rate = error_rate
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, LOG_NAME)
+        # Appends go through '_file'; reads use pread on '_reader', which needs no seek or lock
+        self._file = open(path, 'ab')
+        self._reader = os.open(path, os.O_RDONLY)
+        # One index connection shared by every thread; each query is short, so a lock is enough
+        self._index = sqlite3.connect(
+            os.path.join(directory, INDEX_NAME), isolation_level=None, check_same_thread=False
+        )
+        self._index.execute('PRAGMA journal_mode=WAL')
+        self._index.execute('PRAGMA synchronous=NORMAL')
+        for statement in ARCHIVE_SCHEMA:
+            self._index.execute(statement)
+        self._lock = threading.Lock()
+        # '_write_lock' keeps the offsets of concurrent appends apart
+        self._write_lock = threading.Lock()
+        self.count = self._index.execute('SELECT COUNT(*) FROM archived').fetchone()[0]
+        self._load_titles()
+        # Title lookups and the ones that found the title taken, for /metrics
+        self.lookups = 0
+        self.hits = 0
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._archiver = None
+
+    # (Re)build the Bloom filter from every archived title, with room to grow
+    def _load_titles(self):
+        titles = BloomFilter(max(BLOOM_CAPACITY, self.count * 2), self.error_rate)
+        for (key,) in self._index.execute('SELECT title_key FROM archived'):
+            titles.add(key)
+        self.titles = titles
+
+    # Append 'tasks' to the log, fsync it, and return the (offset, length) of every line
+    # Nothing is visible until 'register' indexes the lines
+    def write(self, tasks):
+        lines = [serializer.dumps(task_entry(task)) + b'\n' for task in tasks]
+        with self._write_lock:
+            offset = self._file.seek(0, os.SEEK_END)
+            self._file.write(b''.join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        locations = []
+        for line in lines:
+            locations.append((offset, len(line)))
+            offset += len(line)
+        return locations
+
+    # Make written tasks readable: 'entries' are (task, version, (offset, length)) triples
+    def register(self, entries):
+        rows = [
+            (task.id, task.user_id, index_key(task.title), version, offset, length)
+            for task, version, (offset, length) in entries
+        ]
+        with self._lock:
+            self._index.execute('BEGIN')
+            # A task archived again (its journal entry was lost in a crash) replaces its old row
+            replaced = len(self._select_in(ARCHIVE_IDS, [row[0] for row in rows]))
+            self._index.executemany(ARCHIVE_INSERT, rows)
+            self._index.execute('COMMIT')
+            self.count += len(rows) - replaced
+            for row in rows:
+                self.titles.add(row[2])
+            if self.titles.count > self.titles.capacity:
+                self._load_titles()
+
+    # Run an IN (...) query for every chunk of 'values' and collect the first column
+    # (the caller holds '_lock')
+    def _select_in(self, query, values):
+        found = set()
+        for start in range(0, len(values), ARCHIVE_MAX_PARAMETERS):
+            chunk = values[start:start + ARCHIVE_MAX_PARAMETERS]
+            found.update(row[0] for row in self._index.execute(query.format(', '.join('?' * len(chunk))), chunk))
+        return found
+
+    # Return the subset of 'task_ids' that are archived
+    def archived_ids(self, task_ids):
+        with self._lock:
+            return self._select_in(ARCHIVE_IDS, list(task_ids))
+
+    # Read the task stored at 'offset'
+    def _read(self, offset, length):
+        return task_from_entry(serializer.loads(os.pread(self._reader, length, offset)))
+
+    # Return (task, version) of archived task 'task_id', or (None, None)
+    def get_versioned(self, task_id):
+        with self._lock:
+            row = self._index.execute(ARCHIVE_LOCATION, (task_id,)).fetchone()
+        if row is None:
+            return None, None
+        offset, length, version = row
+        return self._read(offset, length), version
+
+    # Return archived task 'task_id', or None
+    def get(self, task_id):
+        return self.get_versioned(task_id)[0]
+
+    # Return the version of archived task 'task_id', or None
+    def version(self, task_id):
+        with self._lock:
+            row = self._index.execute(ARCHIVE_LOCATION, (task_id,)).fetchone()
+        return row[2] if row is not None else None
+
+    # Return the largest archived id (0 when the tier is empty)
+    def last_id(self):
+        with self._lock:
+            return self._index.execute('SELECT MAX(id) FROM archived').fetchone()[0] or 0
+
+    # Check if an archived task uses 'title' (case-insensitive)
+    def has_title(self, title):
+        key = index_key(title)
+        self.lookups += 1
+        if key not in self.titles:
+            return False
+        with self._lock:
+            found = self._index.execute(ARCHIVE_HAS_TITLE, (key,)).fetchone() is not None
+        if found:
+            self.hits += 1
+        return found
+
+    # Return the subset of the case-folded 'keys' used by archived tasks
+    def existing_titles(self, keys):
+        keys = list(keys)
+        self.lookups += len(keys)
+        # Only the keys the Bloom filter can't rule out go to disk
+        candidates = [key for key in keys if key in self.titles]
+        with self._lock:
+            found = self._select_in(ARCHIVE_TITLES, candidates)
+        self.hits += len(found)
+        return found
+
+    # Return up to 'limit' archived (id, offset, length) rows with an id greater than 'after',
+    # in id order, optionally only the tasks of 'user_id'
+    def _page(self, after, limit, user_id=None):
+        if user_id is None:
+            query, parameters = 'SELECT id, position, length FROM archived WHERE id > ? ORDER BY id LIMIT ?', (after, limit)
+        else:
+            query = 'SELECT id, position, length FROM archived WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?'
+            parameters = (user_id, after, limit)
+        with self._lock:
+            return self._index.execute(query, parameters).fetchall()
+
+    # Return up to 'limit' archived tasks with an id greater than 'after', in id order
+    def page(self, after=0, limit=20, user_id=None):
+        return [self._read(offset, length) for _, offset, length in self._page(after, limit, user_id)]
+
+    # Yield every archived task in id order, reading the index a chunk at a time
+    def tasks(self, chunk_size=1000):
+        after = 0
+        while True:
+            rows = self._page(after, chunk_size)
+            if not rows:
+                return
+            for _, offset, length in rows:
+                yield self._read(offset, length)
+            after = rows[-1][0]
+
+    def __len__(self):
+        return self.count
+
+    # Start the thread that archives the tasks of 'store' completed more than 'max_age'
+    # seconds ago, checking every 'interval' seconds
+    def start(self, store, max_age, interval):
+        self._archiver = threading.Thread(
+            target=self._archive_loop, args=(store, max_age, interval), name='archiver', daemon=True
+        )
+        self._archiver.start()
+        atexit.register(self.close)
+
+    def _archive_loop(self, store, max_age, interval):
+        while not self._closed:
+            self._wakeup.wait(interval)
+            if not self._closed:
+                store.archive_completed(datetime.now(timezone.utc) - timedelta(seconds=max_age))
+
+    # Stop the archiver thread and close the files
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        if self._archiver is not None and self._archiver is not threading.current_thread():
+            self._archiver.join()
+        with self._write_lock:
+            self._file.close()
+        with self._lock:
+            self._index.close()
+        os.close(self._reader)
+
+
+# Attach a cold tier in 'directory' to 'store' and archive its tasks completed more than
+# 'max_age' seconds ago every 'interval' seconds (a falsy interval disables the thread)
+def open_archive(store, directory, max_age=86400, interval=60):
+    archive = ColdStore(directory)
+    store.attach_archive(archive)
+    if interval:
+        archive.start(store, max_age, interval)
+    return archive
@@ -0,0 +1,90 @@
+# Awaitable wrapper around a storage backend, for the ASGI app
+# SQLite calls can wait on disk and on the database write lock, so they run in worker
+# threads (asyncio.to_thread) and the event loop keeps serving other connections meanwhile.
+# Memory store calls finish in microseconds and never wait on I/O (the journal only queues
+# its entries), so they run inline: a thread hop would cost more than the call itself.
+# That stops being true once a cold tier is attached (utils/archive.py): reads of archived
+# tasks query its SQLite index and read its log, so then the memory store is offloaded too.
+import asyncio
+
+
+class AsyncStore:
+    def __init__(self, store, offload=None):
+        self.store = store
+        self.name = store.name
+        # None: decide per call from the backend (see 'offloaded')
+        self.offload = offload
+
+    # Whether calls run in worker threads: for every backend except a memory store
+    # without a cold tier (checked each time, as a tier can be attached later)
+    def offloaded(self):
+        if self.offload is not None:
+            return self.offload
+        return self.store.name != 'memory' or getattr(self.store, 'archive', None) is not None
+
+    # Call 'function' in a worker thread or inline, depending on the backend
+    async def run(self, function, *args):
+        if self.offloaded():
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def add_user(self, fields):
+        return await self.run(self.store.add_user, fields)
+
+    async def add_task(self, fields):
+        return await self.run(self.store.add_task, fields)
+
+    async def add_users(self, fields_list):
+        return await self.run(self.store.add_users, fields_list)
+
+    async def add_tasks(self, fields_list):
+        return await self.run(self.store.add_tasks, fields_list)
+
+    async def get_user(self, user_id):
+        return await self.run(self.store.get_user, user_id)
+
+    async def get_task(self, task_id):
+        return await self.run(self.store.get_task, task_id)
+
+    async def has_user(self, user_id):
+        return await self.run(self.store.has_user, user_id)
+
+    async def version(self, table, record_id):
+        return await self.run(self.store.version, table, record_id)
+
+    async def get_versioned(self, table, record_id):
+        return await self.run(self.store.get_versioned, table, record_id)
+
+    async def is_unique(self, table, field, value):
+        return await self.run(self.store.is_unique, table, field, value)
+
+    async def existing_keys(self, table, field, values):
+        return await self.run(self.store.existing_keys, table, field, values)
+
+    async def existing_user_ids(self, user_ids):
+        return await self.run(self.store.existing_user_ids, user_ids)
+
+    async def update_task(self, task_id, changes):
+        return await self.run(self.store.update_task, task_id, changes)
+
+    async def update_tasks(self, updates):
+        return await self.run(self.store.update_tasks, updates)
+
+    async def list_tasks(self, status=None, user_id=None, after=0, limit=20):
+        return await self.run(self.store.list_tasks, status, user_id, after, limit)
+
+    async def user_stats(self, user_id):
+        return await self.run(self.store.user_stats, user_id)
+
+    async def rebuild_stats(self):
+        return await self.run(self.store.rebuild_stats)
+
+    async def count(self, table):
+        return await self.run(self.store.count, table)
+
+    # Pull the next item of a blocking iterator (e.g. an export stream), None at the end
+    async def next(self, iterator):
+        return await self.run(next, iterator, None)
+
+    async def close(self):
+        await self.run(self.store.close)
@@ -0,0 +1,44 @@
+# Bounded least-recently-used cache for encoded responses
+# Holds at most 'maxsize' entries; adding one more evicts the entry used longest ago.
+# An OrderedDict keeps the usage order, so every operation is O(1).
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # Counters for /metrics-style reporting
+        self.hits = 0
+        self.misses = 0
+
+    # Return the value stored under 'key', or None
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    # Store 'value' under 'key', evicting the least recently used entry when full
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    # Drop the entry stored under 'key' (missing keys are ignored)
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
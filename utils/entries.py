@@ -0,0 +1,37 @@
+# Journal entries for the records of the in-memory store
+# The store builds these on every write, so they live apart from utils/journal.py: a store
+# without a journal never imports the journal or its snapshot code. The entry format is
+# described in utils/journal.py.
+from utils.models import Task, TaskStatus, parse_timestamp
+
+
+# Return the entry that records a new user
+def user_entry(user):
+    return ['u', user.id, user.firstName, user.lastName, user.email, user.phone]
+
+
+# Return the entry that records a new task
+def task_entry(task):
+    return [
+        't', task.id, task.user_id, task.title, task.description, task.status,
+        task.duration, task.created_at, task.updated_at, task.completed_at
+    ]
+
+
+# Return the entry that records the new status of a task
+def status_entry(task):
+    return ['s', task.id, task.status, task.updated_at, task.completed_at]
+
+
+# Return the entry that records a task moving to the cold tier
+def archive_entry(task):
+    return ['a', task.id]
+
+
+# Build the Task record stored in a task entry
+def task_from_entry(entry):
+    _, task_id, user_id, title, description, status, duration, created_at, updated_at, completed_at = entry
+    return Task(
+        task_id, user_id, title, description, TaskStatus(status), duration,
+        parse_timestamp(created_at), parse_timestamp(updated_at), parse_timestamp(completed_at)
+    )
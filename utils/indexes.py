@@ -0,0 +1,187 @@
+# Secondary indexes that sit next to the 'users' and 'tasks' dictionaries
+# They let the app answer "does this value already exist?" in O(1)
+# instead of scanning every record on every insert.
+import bisect
+import hashlib
+import math
+import threading
+from operator import attrgetter
+
+
+# Build the lookup key used by every unique index
+def index_key(value):
+    # Uniqueness has always been case-insensitive, so fold the value the same way
+    # validate_unique_field does ('str()' guards against non-string payload values)
+    return str(value).lower()
+
+
+# A unique index maps a case-folded field value to the id of the record that owns it
+class UniqueIndex:
+    def __init__(self, field):
+        # 'field' is the record key this index covers (e.g. 'email', 'phone', 'title')
+        self.field = field
+        # 'keys' maps the folded value to the record id
+        self.keys = {}
+        # Lookup counters for the /metrics endpoint ('hits' are values found taken)
+        # They are bumped without a lock, so under heavy concurrency they are approximate
+        self.lookups = 0
+        self.hits = 0
+
+    # Check if a value is already taken
+    def __contains__(self, value):
+        found = index_key(value) in self.keys
+        self.lookups += 1
+        if found:
+            self.hits += 1
+        return found
+
+    # Record a batch of 'lookups' that found 'hits' values taken
+    def count_lookups(self, lookups, hits):
+        self.lookups += lookups
+        self.hits += hits
+
+    # Return how many values are indexed
+    def __len__(self):
+        return len(self.keys)
+
+    # Return the id of the record owning 'value', or None when it is free
+    def get(self, value):
+        return self.keys.get(index_key(value))
+
+    # Register a record (a User or Task) in the index
+    def add(self, record):
+        self.keys[index_key(getattr(record, self.field))] = record.id
+
+    # Remove a record from the index (missing entries are ignored)
+    def remove(self, record):
+        key = index_key(getattr(record, self.field))
+        # Only drop the entry if it still points at this record
+        if self.keys.get(key) == record.id:
+            del self.keys[key]
+
+    # Rebuild the index from scratch from a collection of records
+    # (map/zip keep the loop in C; the keys are folded the same way as index_key)
+    def rebuild(self, records):
+        records = list(records)
+        values = map(str, map(attrgetter(self.field), records))
+        self.keys = dict(zip(map(str.lower, values), map(attrgetter('id'), records)))
+
+
+# A sorted id index maps a key (e.g. a status, a user id) to the ascending list of record ids
+# that carry it. Because ids only grow, inserts are appends, and keyset pagination
+# ("ids after X, at most N of them") is a binary search plus a slice of the page size.
+# The index carries its own lock: each operation is a few list steps, so the lock is held briefly.
+class SortedIdIndex:
+    def __init__(self):
+        # 'ids' maps each key to its sorted list of record ids
+        self.ids = {}
+        self.lock = threading.Lock()
+        # Number of pages served, for the /metrics endpoint
+        self.pages = 0
+
+    # Replace the whole index with 'ids', a dict of key -> ascending list of record ids
+    def rebuild(self, ids):
+        with self.lock:
+            self.ids = ids
+
+    # Return how many ids are filed under 'key'
+    def count(self, key):
+        return len(self.ids.get(key, ()))
+
+    # Return the largest id filed under 'key', or None when there is none
+    def last(self, key):
+        with self.lock:
+            ids = self.ids.get(key)
+            return ids[-1] if ids else None
+
+    # File 'record_id' under 'key'
+    def add(self, key, record_id):
+        with self.lock:
+            self._add(key, record_id)
+
+    def _add(self, key, record_id):
+        ids = self.ids.setdefault(key, [])
+        # New records have the largest id so far, which makes this a plain append
+        if not ids or ids[-1] < record_id:
+            ids.append(record_id)
+        else:
+            bisect.insort(ids, record_id)
+
+    # Remove 'record_id' from 'key' (missing entries are ignored)
+    def remove(self, key, record_id):
+        with self.lock:
+            self._remove(key, record_id)
+
+    def _remove(self, key, record_id):
+        ids = self.ids.get(key)
+        if not ids:
+            return
+        position = bisect.bisect_left(ids, record_id)
+        if position < len(ids) and ids[position] == record_id:
+            del ids[position]
+        if not ids:
+            del self.ids[key]
+
+    # Remove many (key, record_id) pairs at once
+    # Each affected list is filtered in one pass instead of one deletion (and shift) per id
+    def remove_many(self, pairs):
+        grouped = {}
+        for key, record_id in pairs:
+            grouped.setdefault(key, set()).add(record_id)
+        with self.lock:
+            for key, record_ids in grouped.items():
+                ids = self.ids.get(key)
+                if not ids:
+                    continue
+                ids[:] = [record_id for record_id in ids if record_id not in record_ids]
+                if not ids:
+                    del self.ids[key]
+
+    # Move 'record_id' from 'old_key' to 'new_key'
+    def move(self, old_key, new_key, record_id):
+        if old_key != new_key:
+            with self.lock:
+                self._remove(old_key, record_id)
+                self._add(new_key, record_id)
+
+    # Return up to 'limit' ids filed under 'key' that are greater than 'after'
+    def page(self, key, after=0, limit=20):
+        with self.lock:
+            self.pages += 1
+            ids = self.ids.get(key)
+            if not ids:
+                return []
+            start = bisect.bisect_right(ids, after)
+            return ids[start:start + limit]
+
+
+# A Bloom filter answers "could this key have been added?" in a few bits per key
+# It never misses a key that was added, and wrongly says yes for about 'error_rate'
+# of the keys that were not, so a "no" can skip a slower exact lookup entirely.
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        # Standard sizing: m = -n ln(p) / ln(2)^2 bits and k = m/n ln(2) hash functions
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        # Number of keys added so far
+        self.count = 0
+
+    # Return the bit positions of 'key', derived from two halves of one hash (double hashing)
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + n * second) % self.size for n in range(self.hashes)]
+
+    # Add 'key' to the filter
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    # Check if 'key' may have been added
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
@@ -0,0 +1,312 @@
+# Write-ahead journal for the in-memory store
+# Every mutation (new user, new task, task status change) is appended to a log as one JSON line.
+# Request threads only encode the line and queue it; a background writer thread writes the queue
+# and fsyncs it every 'fsync_interval' seconds, so many writes share one fsync (group commit).
+# A crash can therefore lose at most the last 'fsync_interval' seconds of acknowledged writes.
+#
+# Periodically the whole store is written to a compacted snapshot and older log segments are
+# deleted. At startup the snapshot and the remaining segments are replayed to rebuild the
+# dictionaries, indexes and ID counters.
+#
+# Files in the journal directory:
+#   snapshot.bin           binary snapshot (see utils/snapshot.py), memory-mapped at startup
+#   snapshot.ndjson        first line ["snapshot", N], then one entry per user and task
+#                          (written instead of snapshot.bin with snapshot_format='ndjson',
+#                          or when some text can't be stored in the binary format)
+#   journal-00000N.log     log segments; replay starts at the segment named in the snapshot
+#
+# Entries are JSON arrays (built by utils/entries.py):
+#   ["u", id, firstName, lastName, email, phone]
+#   ["t", id, user_id, title, description, status, duration, created_at, updated_at, completed_at]
+#   ["s", id, status, updated_at, completed_at]
+#   ["a", id]                       the task moved to the cold tier (see utils/archive.py)
+import atexit
+import gc
+import logging
+import os
+import re
+import threading
+
+from utils import serializer
+from utils.entries import user_entry, task_entry, task_from_entry
+from utils.models import User, TaskStatus, parse_timestamp
+from utils.snapshot import write_snapshot, read_snapshot, HEADER
+
+SNAPSHOT_NAME = 'snapshot.ndjson'
+BINARY_SNAPSHOT_NAME = 'snapshot.bin'
+SEGMENT_PATTERN = re.compile(r'^journal-(\d{6})\.log$')
+
+
+# Return the file name of log segment number 'number'
+def segment_name(number):
+    return f'journal-{number:06d}.log'
+
+
+class Journal:
+    def __init__(self, directory, fsync_interval=0.05, snapshot_format='binary'):
+        self.directory = directory
+        self.fsync_interval = fsync_interval
+        self.snapshot_format = snapshot_format
+        os.makedirs(directory, exist_ok=True)
+        # Keep appending to the newest segment, or start the first one
+        segments = list_segments(directory)
+        self.segment = segments[-1] if segments else 1
+        path = os.path.join(directory, segment_name(self.segment))
+        if segments:
+            trim_torn_line(path)
+        self._file = open(path, 'ab')
+        # Encoded lines waiting for the writer thread
+        self._pending = []
+        # '_lock' guards '_pending'; '_flush_lock' serializes writes, rotations and snapshots
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._writer = None
+        self._snapshotter = None
+
+    # Queue an entry for the log (never blocks on disk I/O)
+    def append(self, entry):
+        line = serializer.dumps(entry) + b'\n'
+        with self._lock:
+            self._pending.append(line)
+
+    # Write and fsync everything queued so far
+    def flush(self):
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self):
+        # Take the file together with the lines, so a rotation can't send them to the wrong segment
+        with self._lock:
+            lines, self._pending = self._pending, []
+            file = self._file
+        if lines:
+            file.write(b''.join(lines))
+            file.flush()
+            os.fsync(file.fileno())
+
+    # Start the writer thread, and the snapshot thread when 'snapshot_interval' is set
+    def start(self, store, snapshot_interval=None):
+        self._writer = threading.Thread(target=self._write_loop, name='journal-writer', daemon=True)
+        self._writer.start()
+        if snapshot_interval:
+            self._snapshotter = threading.Thread(
+                target=self._snapshot_loop, args=(store, snapshot_interval), name='journal-snapshot', daemon=True
+            )
+            self._snapshotter.start()
+        # Write whatever is still queued when the process exits normally
+        atexit.register(self.close)
+
+    def _write_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.fsync_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def _snapshot_loop(self, store, interval):
+        while not self._closed:
+            self._wakeup.wait(interval)
+            if not self._closed:
+                # A failed snapshot leaves the segments in place, so nothing is lost; log it
+                # and try again next time instead of stopping compaction for good
+                try:
+                    self.snapshot(store)
+                except Exception:
+                    logging.getLogger('taskmanager.journal').exception('journal snapshot failed')
+
+    # Write a compacted snapshot of 'store' and delete the log segments it replaces
+    def snapshot(self, store):
+        # Switch to a new segment while no mutation is half done, so every change is either
+        # already in the store (and in the snapshot) or will be logged to the new segment.
+        # Only the queue and the file handle are swapped while writers are held; the old
+        # segment is written and fsynced after they are released
+        with store.hold_writes():
+            with self._lock:
+                lines, self._pending = self._pending, []
+                previous = self._file
+                self.segment += 1
+                self._file = open(os.path.join(self.directory, segment_name(self.segment)), 'ab')
+                first_segment = self.segment
+
+        # '_flush_lock' waits for a flush still writing to the old segment, and keeps the
+        # writer thread from syncing the new segment before the old one is complete
+        with self._flush_lock:
+            if lines:
+                previous.write(b''.join(lines))
+            previous.flush()
+            os.fsync(previous.fileno())
+            previous.close()
+
+        # Dump the store without blocking writers; entries are absolute values, so replaying
+        # the new segment on top of the snapshot always ends in the latest state
+        # (archived tasks live in the cold tier's own files, so only the hot ones are dumped)
+        name = SNAPSHOT_NAME
+        if self.snapshot_format == 'binary':
+            try:
+                self._write_snapshot(BINARY_SNAPSHOT_NAME, lambda file: write_snapshot(
+                    file, first_segment, store.export('users'), store.export('tasks', include_archived=False)
+                ))
+                name = BINARY_SNAPSHOT_NAME
+            except ValueError:
+                # Some value doesn't fit the binary format: text that is not a string or holds
+                # a NUL (its separator), or a number beyond int64
+                pass
+        if name == SNAPSHOT_NAME:
+            self._write_snapshot(SNAPSHOT_NAME, lambda file: self._write_ndjson(file, store, first_segment))
+        # Drop the snapshot of the other format, which is now older
+        other = os.path.join(self.directory, SNAPSHOT_NAME if name == BINARY_SNAPSHOT_NAME else BINARY_SNAPSHOT_NAME)
+        if os.path.exists(other):
+            os.remove(other)
+
+        # The older segments are now covered by the snapshot
+        for number in list_segments(self.directory):
+            if number < first_segment:
+                os.remove(os.path.join(self.directory, segment_name(number)))
+
+    # Write a snapshot file through 'write', fsync it and move it into place as 'name'
+    def _write_snapshot(self, name, write):
+        temporary = os.path.join(self.directory, name + '.tmp')
+        try:
+            with open(temporary, 'wb') as file:
+                write(file)
+                file.flush()
+                os.fsync(file.fileno())
+        except BaseException:
+            os.remove(temporary)
+            raise
+        os.replace(temporary, os.path.join(self.directory, name))
+
+    @staticmethod
+    def _write_ndjson(file, store, first_segment):
+        file.write(serializer.dumps(['snapshot', first_segment]) + b'\n')
+        for user in store.export('users'):
+            file.write(serializer.dumps(user_entry(user)) + b'\n')
+        for task in store.export('tasks', include_archived=False):
+            file.write(serializer.dumps(task_entry(task)) + b'\n')
+
+    # Stop the background threads and write everything still queued
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        with self._flush_lock:
+            self._flush()
+            self._file.close()
+
+
+# Return the numbers of the log segments in 'directory', oldest first
+def list_segments(directory):
+    numbers = []
+    for name in os.listdir(directory):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            numbers.append(int(match.group(1)))
+    return sorted(numbers)
+
+
+# Cut a torn last line (from a crash mid-write) off the segment at 'path'
+# Replay ignores that line, but appending after it would glue the next entry onto it
+# and leave a corrupt line that does end in a newline
+def trim_torn_line(path, chunk_size=65536):
+    with open(path, 'r+b') as file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        # Look for the last newline, reading backwards a chunk at a time
+        while position > 0:
+            start = max(0, position - chunk_size)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b'\n')
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position != end:
+            file.truncate(position)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+# Yield the entries stored in 'path'; a torn last line (from a crash mid-write) is ignored
+def read_entries(path):
+    with open(path, 'rb') as file:
+        for line in file:
+            try:
+                yield serializer.loads(line)
+            except ValueError:
+                if line.endswith(b'\n'):
+                    raise
+                return
+
+
+# Apply one journal entry to 'store'
+def apply_entry(store, entry):
+    kind = entry[0]
+    if kind == 't':
+        store.restore('tasks', task_from_entry(entry))
+    elif kind == 's':
+        _, task_id, status, updated_at, completed_at = entry
+        store.restore_status(task_id, TaskStatus(status), parse_timestamp(updated_at), parse_timestamp(completed_at))
+    elif kind == 'u':
+        store.restore('users', User(*entry[1:]))
+    elif kind == 'a':
+        store.restore_archived(entry[1])
+
+
+# Rebuild 'store' from the snapshot and log segments in 'directory'
+def replay(store, directory):
+    if not os.path.isdir(directory):
+        return
+    # Replay only allocates long-lived records, so the cyclic garbage collector would
+    # rescan millions of objects for nothing; pause it until the store is rebuilt
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        _replay(store, directory)
+    finally:
+        if collecting:
+            gc.enable()
+    store.finish_restore()
+
+
+# Return the first segment after the snapshot at 'path' and its format, or (0, None)
+def _snapshot_segment(path, binary):
+    if not os.path.exists(path):
+        return 0, None
+    with open(path, 'rb') as file:
+        if binary:
+            return HEADER.unpack(file.read(HEADER.size))[1], 'binary'
+        return serializer.loads(file.readline())[1], 'ndjson'
+
+
+def _replay(store, directory):
+    # A crash between writing one snapshot format and deleting the other can leave both;
+    # the one that covers more segments is the newer
+    first_segment, snapshot_format = max(
+        _snapshot_segment(os.path.join(directory, SNAPSHOT_NAME), False),
+        _snapshot_segment(os.path.join(directory, BINARY_SNAPSHOT_NAME), True),
+        key=lambda found: found[0]
+    )
+    if snapshot_format == 'binary':
+        first_segment, users, tasks = read_snapshot(os.path.join(directory, BINARY_SNAPSHOT_NAME))
+        store.restore_many('users', users)
+        store.restore_many('tasks', tasks)
+    elif snapshot_format == 'ndjson':
+        for entry in read_entries(os.path.join(directory, SNAPSHOT_NAME)):
+            if entry[0] != 'snapshot':
+                apply_entry(store, entry)
+    first_segment = max(first_segment, 1)
+    for number in list_segments(directory):
+        if number >= first_segment:
+            for entry in read_entries(os.path.join(directory, segment_name(number))):
+                apply_entry(store, entry)
+
+
+# Replay 'directory' into 'store', then log every further change of 'store' there
+def open_journal(store, directory, fsync_interval=0.05, snapshot_interval=None, snapshot_format='binary'):
+    replay(store, directory)
+    journal = Journal(directory, fsync_interval, snapshot_format)
+    store.journal = journal
+    journal.start(store, snapshot_interval)
+    return journal
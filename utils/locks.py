@@ -0,0 +1,37 @@
+# Striped locks for the in-memory store
+# Instead of one global lock, keys are spread over a fixed pool of locks,
+# so writes that touch different keys can run on different threads at the same time.
+import threading
+from contextlib import contextmanager
+
+
+class StripedLock:
+    def __init__(self, stripes=64):
+        # A fixed number of locks keeps memory bounded no matter how many keys exist
+        self.locks = [threading.Lock() for _ in range(stripes)]
+
+    # Return the stripe number that guards 'key'
+    def stripe(self, key):
+        return hash(key) % len(self.locks)
+
+    # Hold the lock guarding a single key
+    def hold(self, key):
+        return self.locks[self.stripe(key)]
+
+    # Hold the locks guarding several keys at once
+    @contextmanager
+    def hold_many(self, keys):
+        # Acquire stripes in ascending order (and each one only once) so two threads
+        # locking overlapping keys can never deadlock
+        stripes = sorted({self.stripe(key) for key in keys})
+        for stripe in stripes:
+            self.locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self.locks[stripe].release()
+
+    # Hold every stripe (used by operations that touch the whole table)
+    def hold_all(self):
+        return self.hold_many(range(len(self.locks)))
@@ -0,0 +1,63 @@
+# Compact record classes for users and tasks
+# Records use __slots__ instead of a per-record dictionary, statuses are shared enum members
+# instead of one string per task, and timestamps are kept as datetime objects that are only
+# turned into ISO strings when a response is serialized.
+from dataclasses import dataclass
+from datetime import datetime
+from enum import Enum
+
+
+# The allowed task statuses
+# Members are created once, so every task points at the same three objects.
+# TaskStatus is a str subclass, so it still compares equal to 'pending' etc.
+class TaskStatus(str, Enum):
+    PENDING = 'pending'
+    IN_PROGRESS = 'in-progress'
+    COMPLETED = 'completed'
+
+
+# A stored user
+# Fields are declared in the order of the API response, which orjson follows when
+# it encodes a record directly
+@dataclass(slots=True)
+class User:
+    id: int
+    firstName: str
+    lastName: str
+    email: str
+    phone: str
+
+    # Return an independent copy of the record
+    def copy(self):
+        return User(self.id, self.firstName, self.lastName, self.email, self.phone)
+
+
+# A stored task
+@dataclass(slots=True)
+class Task:
+    id: int
+    user_id: int | None
+    title: str
+    description: str
+    status: TaskStatus
+    duration: int
+    created_at: datetime
+    updated_at: datetime | None = None
+    completed_at: datetime | None = None
+
+    # Return an independent copy of the record
+    def copy(self):
+        return Task(
+            self.id, self.user_id, self.title, self.description, self.status,
+            self.duration, self.created_at, self.updated_at, self.completed_at
+        )
+
+
+# Format an optional timestamp as an ISO string (None stays None)
+def format_timestamp(value):
+    return value.isoformat() if value is not None else None
+
+
+# Parse an optional ISO string back into a timestamp (None stays None)
+def parse_timestamp(value):
+    return datetime.fromisoformat(value) if value is not None else None
@@ -1,5 +1,11 @@
-# Import the datetime class and timezone object to work with date, time, and time zone information
-from datetime import datetime, timezone
+# Import zlib to gzip export streams
+import zlib
+
+# Import the serializer that encodes response bodies (orjson/msgspec when installed)
+from utils import serializer
+
+# Import the helper that formats record timestamps
+from utils.models import format_timestamp
 
 # Create a standardized response object
 def make_response(status, message, data=None, code=200):
@@ -8,15 +14,16 @@ def make_response(status, message, data=None, code=200):
     # 'message' provides additional information or context about the response
     # 'data' holds any optional payload or result data (default is None)
     # 'timestamp' records the current UTC time when the response was generated
+    # (formatted at most once per millisecond, see serializer.envelope_timestamp)
     # The second return value 'code' represents the HTTP status code (default is 200)
     return {
         'status': status,
         'message': message,
         'data': data,
-        'timestamp': datetime.now(timezone.utc).isoformat()
+        'timestamp': serializer.envelope_timestamp()
     }, code
 
-# Format a user object for consistent API response structure
+# Format a user record for consistent API response structure
 def format_user(user):
     # Return a dictionary containing the user's essential details
     # 'id' is the unique identifier for the user
@@ -25,14 +32,14 @@ def format_user(user):
     # 'email' is the user's email address
     # 'phone' is the user's phone number
     return {
-        'id': user['id'],
-        'firstName': user['firstName'],
-        'lastName': user['lastName'],
-        'email': user['email'],
-        'phone': user['phone']
+        'id': user.id,
+        'firstName': user.firstName,
+        'lastName': user.lastName,
+        'email': user.email,
+        'phone': user.phone
     }
 
-# Format a task object for consistent API response structure
+# Format a task record for consistent API response structure
 def format_task(task):
     # Return a dictionary containing all key details about a task
     # 'id' is the unique identifier for the task
@@ -44,16 +51,18 @@ def format_task(task):
     # 'created_at' records the date and time when the task was created
     # 'updated_at' records the date and time when the task details were last modified
     # 'completed_at' records the date and time when the task was finished
+    # The status is stored as a TaskStatus member and the timestamps as datetime objects,
+    # so they are turned into plain strings here, at serialization time
     return {
-        'id': task['id'],
-        'user_id': task['user_id'],
-        'title': task['title'],
-        'description': task['description'],
-        'status': task['status'],
-        'duration': task['duration'],
-        'created_at': task['created_at'],
-        'updated_at': task['updated_at'],
-        'completed_at': task['completed_at']    
+        'id': task.id,
+        'user_id': task.user_id,
+        'title': task.title,
+        'description': task.description,
+        'status': task.status.value,
+        'duration': task.duration,
+        'created_at': format_timestamp(task.created_at),
+        'updated_at': format_timestamp(task.updated_at),
+        'completed_at': format_timestamp(task.completed_at)
     }
 
 # Format a list of user objects for consistent API response structure
@@ -89,13 +98,13 @@ def not_found_response(message="Resource not found"):
     return make_response("error", message, None, 404)
 
 # Generate a standardized "bad request" error response for invalid client requests
-def bad_request_response(message="Bad request"):
+def bad_request_response(message="Bad request", data=None):
     # Call the 'make_response' function to build an error response object
     # The first argument "error" indicates that the request failed
     # 'message' provides a description of the error (default is "Bad request")
-    # The 'data' field is set to None because no valid data is returned
+    # 'data' is None unless there are details to report, such as per-record errors
     # The HTTP status code 400 represents a client-side error (bad request)
-    return make_response("error", message, None, 400)
+    return make_response("error", message, data, 400)
 
 # Generate a standardized "internal server error" response for unexpected server issues
 def internal_error_response(message="Internal server error"):
@@ -133,3 +142,54 @@ def format_response(data, data_type):
     else:
         return data
 
+
+# Prepare stored records for a response body
+# When the serializer can encode records directly, they are passed through untouched
+# instead of being copied field by field; otherwise they go through format_response
+def response_data(data, data_type):
+    if serializer.encodes_records and data_type in ('user', 'task', 'users', 'tasks'):
+        return data
+    return format_response(data, data_type)
+
+# Build the strong ETag of version 'version' of a record
+# 'epoch' identifies the store the version belongs to (see Store.get_versioned)
+def make_etag(epoch, table, record_id, version):
+    return f'"{epoch}-{table}-{record_id}-{version}"'
+
+# Check if an If-None-Match header value matches 'etag'
+# The header may list several tags, use weak 'W/' tags, or be '*' (any version)
+def etag_matches(header, etag):
+    if not header:
+        return False
+    for tag in header.split(','):
+        tag = tag.strip()
+        if tag == '*' or tag.removeprefix('W/') == etag:
+            return True
+    return False
+
+# Turn records into newline-delimited JSON (one formatted record per line)
+# Records are pulled from 'records' one at a time and the lines are grouped into
+# blocks of about 'block_size' bytes, so memory use does not grow with the export
+def ndjson_stream(records, data_type, block_size=65536):
+    block = []
+    size = 0
+    for record in records:
+        line = serializer.dumps(response_data(record, data_type)) + b'\n'
+        block.append(line)
+        size += len(line)
+        if size >= block_size:
+            yield b''.join(block)
+            block = []
+            size = 0
+    if block:
+        yield b''.join(block)
+
+# Gzip a stream of byte blocks as it is produced
+def gzip_stream(chunks, level=6):
+    # 'wbits=31' makes zlib write the gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,97 @@
+# Fast JSON serialization for API responses
+# orjson (or msgspec) is used when it is installed; otherwise everything falls back to the
+# standard library encoder. TASK_MANAGER_SERIALIZER forces one: 'orjson', 'msgspec' or 'json'.
+import json
+import os
+import time
+from dataclasses import fields, is_dataclass
+from datetime import datetime, timezone
+from enum import Enum
+
+from flask.json.provider import DefaultJSONProvider
+
+
+# Encode values the standard library json module does not know about
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value):
+        return {field.name: getattr(value, field.name) for field in fields(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+# Pick the encoder: the requested one, else the fastest one that is installed
+def _load_backend(name):
+    if name in ('auto', 'orjson'):
+        try:
+            import orjson
+            return 'orjson', lambda value: orjson.dumps(value, default=_default), orjson.loads
+        except ImportError:
+            if name == 'orjson':
+                raise
+    if name in ('auto', 'msgspec'):
+        try:
+            import msgspec
+            encoder = msgspec.json.Encoder(enc_hook=_default)
+            return 'msgspec', encoder.encode, msgspec.json.decode
+        except ImportError:
+            if name == 'msgspec':
+                raise
+    return 'json', lambda value: json.dumps(value, separators=(',', ':'), default=_default).encode('utf-8'), json.loads
+
+
+# 'backend' names the encoder in use; 'dumps' returns UTF-8 bytes, 'loads' accepts str or bytes
+backend, dumps, loads = _load_backend(os.environ.get('TASK_MANAGER_SERIALIZER', 'auto'))
+
+# orjson encodes the stored User/Task records as they are (slotted dataclasses, enum
+# statuses and datetimes all come out exactly as format_user/format_task would write them),
+# so responses can skip copying them field by field. msgspec writes UTC datetimes with a
+# 'Z' suffix instead of '+00:00', so it still goes through the formatters.
+encodes_records = backend == 'orjson'
+
+# The last envelope timestamp, cached as (millisecond, ISO string)
+_timestamp = (None, None)
+
+
+# Return the current UTC time as an ISO string, formatting it at most once per millisecond
+def envelope_timestamp():
+    global _timestamp
+    millisecond = time.time_ns() // 1_000_000
+    cached_millisecond, text = _timestamp
+    if millisecond != cached_millisecond:
+        seconds, remainder = divmod(millisecond, 1000)
+        moment = datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=remainder * 1000)
+        text = moment.isoformat(timespec='microseconds')
+        # Replace the whole tuple at once so other threads never see a half-updated cache
+        _timestamp = (millisecond, text)
+    return text
+
+
+# Encode a standard response envelope straight to bytes
+def encode_envelope(status, message, data=None):
+    return dumps({'status': status, 'message': message, 'data': data, 'timestamp': envelope_timestamp()})
+
+
+# Encode a standard response envelope around 'data' that is already encoded to bytes
+# (used to splice cached record bodies into a response with a fresh timestamp)
+def encode_envelope_bytes(status, message, data):
+    return b''.join((
+        b'{"status":', dumps(status), b',"message":', dumps(message), b',"data":', data,
+        b',"timestamp":', dumps(envelope_timestamp()), b'}'
+    ))
+
+
+# Flask JSON provider that encodes response bodies with the selected backend
+class FastJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    # Build the response from the encoded bytes directly, without a str round-trip
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,155 @@
+# Binary snapshot of the memory store, warm-loaded by memory-mapping the file
+# The journal's NDJSON snapshot is parsed one JSON line at a time. This format instead lays
+# every field out as a column: numbers as packed int64/int8 arrays copied straight out of the
+# mapped file, and text as one NUL-separated UTF-8 block per field that a single split()
+# turns into the list of values. The records are then built column-wise with map(), so a
+# warm start does no JSON parsing at all.
+#
+# Layout (little-endian):
+#   b'TMSNAP01', then int64 first segment, user count, task count
+#   users:  int64 ids, then the text columns firstName, lastName, email, phone
+#   tasks:  int64 ids, int64 user ids (0 = none), int8 status codes, int64 durations,
+#           then the text columns title, description, created_at, updated_at, completed_at
+#           (timestamps as ISO strings, '' = none)
+#   every text column is an int64 byte length followed by the values joined by NUL
+import mmap
+import struct
+import sys
+from array import array
+from datetime import datetime
+from operator import attrgetter
+
+from utils.models import User, Task, TaskStatus, format_timestamp
+
+MAGIC = b'TMSNAP01'
+HEADER = struct.Struct('<8sqqq')
+LENGTH = struct.Struct('<q')
+# Status codes in the int8 column
+STATUSES = list(TaskStatus)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+
+# Return the bytes of a packed array, in little-endian order
+def _packed(column):
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+# Return the bytes of a text column; raises ValueError when a value is not a string
+# or holds the NUL separator
+def _text_column(values):
+    try:
+        text = '\0'.join(values)
+    except TypeError:
+        raise ValueError('text column holds a value that is not a string') from None
+    if text.count('\0') != max(len(values) - 1, 0):
+        raise ValueError('text contains a NUL character')
+    data = text.encode('utf-8')
+    return LENGTH.pack(len(data)) + data
+
+
+# Read 'records' once and return their columns: one array per number field ('numbers' maps
+# a field to its array type code and to a function reading it from a record) and one list
+# per text field. Only the columns are kept, not the records, so the store isn't copied
+# Raises ValueError when a number doesn't fit its column (beyond int64, or not an integer)
+def _columns(records, numbers, texts):
+    number_columns = [(array(code), read) for code, read in numbers]
+    text_columns = [(field, []) for field in texts]
+    try:
+        for record in records:
+            for column, read in number_columns:
+                column.append(read(record))
+            for field, column in text_columns:
+                column.append(getattr(record, field))
+    except (OverflowError, TypeError):
+        raise ValueError('number does not fit a 64-bit column') from None
+    return [column for column, _ in number_columns], [column for _, column in text_columns]
+
+
+# Write 'users' and 'tasks' (record iterables, each read once) to the open binary 'file'
+# Raises ValueError when some value can't be stored (text that is not a string or holds a
+# NUL, a number beyond int64), so the caller can fall back to NDJSON
+def write_snapshot(file, first_segment, users, tasks):
+    (user_ids,), user_texts = _columns(
+        users, [('q', attrgetter('id'))], ('firstName', 'lastName', 'email', 'phone')
+    )
+    task_numbers, task_texts = _columns(
+        tasks,
+        [('q', attrgetter('id')), ('q', lambda task: task.user_id or 0),
+         ('b', lambda task: STATUS_CODES[task.status]), ('q', attrgetter('duration'))],
+        ('title', 'description', 'created_at', 'updated_at', 'completed_at')
+    )
+    # Timestamps are stored as ISO strings ('' = none)
+    for column in task_texts[2:]:
+        column[:] = [format_timestamp(value) or '' for value in column]
+
+    file.write(HEADER.pack(MAGIC, first_segment, len(user_ids), len(task_numbers[0])))
+    file.write(_packed(user_ids))
+    for column in user_texts:
+        file.write(_text_column(column))
+    for column in task_numbers:
+        file.write(_packed(column))
+    for column in task_texts:
+        file.write(_text_column(column))
+
+
+# Reads the columns of a mapped snapshot in order
+class _Reader:
+    def __init__(self, view):
+        self.view = view
+        self.position = 0
+
+    def numbers(self, code, count):
+        column = array(code)
+        end = self.position + column.itemsize * count
+        column.frombytes(self.view[self.position:end])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        self.position = end
+        return column
+
+    def texts(self, count):
+        (length,) = LENGTH.unpack_from(self.view, self.position)
+        start = self.position + LENGTH.size
+        self.position = start + length
+        if count == 0:
+            return []
+        return str(self.view[start:self.position], 'utf-8').split('\0')
+
+
+# Return the timestamps of an ISO text column ('' = none)
+def _timestamps(values):
+    parse = datetime.fromisoformat
+    return [parse(value) if value else None for value in values]
+
+
+# Read the snapshot at 'path' and return (first segment, users, tasks)
+def read_snapshot(path):
+    with open(path, 'rb') as file:
+        mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    try:
+        magic, first_segment, user_count, task_count = HEADER.unpack_from(view)
+        if magic != MAGIC:
+            raise ValueError(f'{path} is not a binary snapshot')
+        reader = _Reader(view)
+        reader.position = HEADER.size
+        user_ids = reader.numbers('q', user_count)
+        user_columns = [reader.texts(user_count) for _ in range(4)]
+        users = list(map(User, user_ids, *user_columns))
+
+        task_ids = reader.numbers('q', task_count)
+        owners = [user_id or None for user_id in reader.numbers('q', task_count)]
+        statuses = list(map(STATUSES.__getitem__, reader.numbers('b', task_count)))
+        durations = reader.numbers('q', task_count)
+        titles = reader.texts(task_count)
+        descriptions = reader.texts(task_count)
+        created, updated, completed = (_timestamps(reader.texts(task_count)) for _ in range(3))
+        tasks = list(map(Task, task_ids, owners, titles, descriptions, statuses, durations, created, updated, completed))
+        return first_segment, users, tasks
+    finally:
+        # The columns are copies, so the mapping can go as soon as they are read
+        view.release()
+        mapped.close()
@@ -0,0 +1,467 @@
+# SQLite storage backend
+# Kept apart from utils/storage.py so workers that run on the memory store never import sqlite3;
+# create_store imports this module only when TASK_MANAGER_STORAGE=sqlite.
+import sqlite3
+import threading
+
+from utils.indexes import index_key
+from utils.models import User, Task, TaskStatus, format_timestamp, parse_timestamp
+from utils.stats import UserStats
+from utils.validators import MAX_INT64
+from utils.storage import (
+    Store, DuplicateRecordError, TaskCompletedError, new_user, new_task, TASK_UPDATABLE
+)
+
+# SQL used by SQLiteStore
+# The statements are module constants so sqlite3's per-connection statement cache
+# compiles each one once and reuses the prepared statement on every call.
+# Seconds from created_at to completed_at of a completed task in a trigger (0 when not timed)
+SQLITE_TIMED_COMPLETION = "(NEW.status = 'completed' AND NEW.completed_at IS NOT NULL)"
+SQLITE_COMPLETION_SECONDS = (
+    f'CASE WHEN {SQLITE_TIMED_COMPLETION} '
+    'THEN (julianday(NEW.completed_at) - julianday(NEW.created_at)) * 86400 ELSE 0 END'
+)
+SQLITE_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        firstName TEXT NOT NULL,
+        lastName TEXT NOT NULL,
+        email TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        email_key TEXT NOT NULL,
+        phone_key TEXT NOT NULL
+    )''',
+    '''CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users (id),
+        title TEXT NOT NULL,
+        description TEXT NOT NULL,
+        status TEXT NOT NULL,
+        duration INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        updated_at TEXT,
+        completed_at TEXT,
+        title_key TEXT NOT NULL,
+        version INTEGER NOT NULL DEFAULT 1
+    )''',
+    # UNIQUE indexes on the case-folded keys back the email/phone/title checks
+    'CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email_key)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS users_phone_key ON users (phone_key)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS tasks_title_key ON tasks (title_key)',
+    # Listing indexes end in 'id' so keyset pagination reads the page straight from the index
+    'CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, id)',
+    'CREATE INDEX IF NOT EXISTS tasks_user ON tasks (user_id, id)',
+    'CREATE INDEX IF NOT EXISTS tasks_user_status ON tasks (user_id, status, id)',
+    # Running task aggregates per user, kept up to date by the triggers below
+    '''CREATE TABLE IF NOT EXISTS user_stats (
+        user_id INTEGER PRIMARY KEY,
+        pending INTEGER NOT NULL DEFAULT 0,
+        in_progress INTEGER NOT NULL DEFAULT 0,
+        completed INTEGER NOT NULL DEFAULT 0,
+        total_duration INTEGER NOT NULL DEFAULT 0,
+        remaining_duration INTEGER NOT NULL DEFAULT 0,
+        completion_seconds REAL NOT NULL DEFAULT 0,
+        timed_completions INTEGER NOT NULL DEFAULT 0
+    )''',
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks
+    WHEN NEW.user_id IS NOT NULL BEGIN
+        INSERT OR IGNORE INTO user_stats (user_id) VALUES (NEW.user_id);
+        UPDATE user_stats SET
+            pending = pending + (NEW.status = 'pending'),
+            in_progress = in_progress + (NEW.status = 'in-progress'),
+            completed = completed + (NEW.status = 'completed'),
+            total_duration = total_duration + NEW.duration,
+            remaining_duration = remaining_duration + (NEW.status != 'completed') * NEW.duration,
+            completion_seconds = completion_seconds + {SQLITE_COMPLETION_SECONDS},
+            timed_completions = timed_completions + {SQLITE_TIMED_COMPLETION}
+        WHERE user_id = NEW.user_id;
+    END''',
+    # Completed tasks never change again, so an update only ever moves a task towards 'completed'
+    f'''CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE OF status ON tasks
+    WHEN NEW.user_id IS NOT NULL AND NEW.status != OLD.status BEGIN
+        UPDATE user_stats SET
+            pending = pending + (NEW.status = 'pending') - (OLD.status = 'pending'),
+            in_progress = in_progress + (NEW.status = 'in-progress') - (OLD.status = 'in-progress'),
+            completed = completed + (NEW.status = 'completed'),
+            remaining_duration = remaining_duration - (NEW.status = 'completed') * NEW.duration,
+            completion_seconds = completion_seconds + {SQLITE_COMPLETION_SECONDS},
+            timed_completions = timed_completions + {SQLITE_TIMED_COMPLETION}
+        WHERE user_id = NEW.user_id;
+    END''',
+)
+SQLITE_USER_COLUMNS = 'id, firstName, lastName, email, phone'
+SQLITE_TASK_COLUMNS = 'id, user_id, title, description, status, duration, created_at, updated_at, completed_at'
+SQLITE_INSERT_USER = (
+    'INSERT INTO users (firstName, lastName, email, phone, email_key, phone_key) '
+    'VALUES (?, ?, ?, ?, ?, ?)'
+)
+SQLITE_INSERT_TASK = (
+    'INSERT INTO tasks (user_id, title, description, status, duration, created_at, '
+    'updated_at, completed_at, title_key) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+SQLITE_SELECT_USER = f'SELECT {SQLITE_USER_COLUMNS} FROM users WHERE id = ?'
+SQLITE_SELECT_TASK = f'SELECT {SQLITE_TASK_COLUMNS} FROM tasks WHERE id = ?'
+SQLITE_HAS_USER = 'SELECT 1 FROM users WHERE id = ?'
+# Largest number of '?' placeholders used in one IN (...) query
+SQLITE_MAX_PARAMETERS = 500
+SQLITE_EXISTING_KEYS = {
+    ('users', 'email'): 'SELECT email_key AS key FROM users WHERE email_key IN ({})',
+    ('users', 'phone'): 'SELECT phone_key AS key FROM users WHERE phone_key IN ({})',
+    ('tasks', 'title'): 'SELECT title_key AS key FROM tasks WHERE title_key IN ({})',
+}
+SQLITE_EXISTING_USERS = 'SELECT id AS key FROM users WHERE id IN ({})'
+SQLITE_UNIQUE_LOOKUPS = {
+    ('users', 'email'): 'SELECT 1 FROM users WHERE email_key = ?',
+    ('users', 'phone'): 'SELECT 1 FROM users WHERE phone_key = ?',
+    ('tasks', 'title'): 'SELECT 1 FROM tasks WHERE title_key = ?',
+}
+SQLITE_TASK_STATUS = 'SELECT status FROM tasks WHERE id = ?'
+SQLITE_TASK_VERSION = 'SELECT version FROM tasks WHERE id = ?'
+SQLITE_VERSIONED_TASK = f'SELECT {SQLITE_TASK_COLUMNS}, version FROM tasks WHERE id = ?'
+# Databases created before tasks had a version column get it added on open
+SQLITE_ADD_VERSION = 'ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1'
+SQLITE_SELECT_STATS = (
+    'SELECT pending, in_progress, completed, total_duration, remaining_duration, '
+    'completion_seconds, timed_completions FROM user_stats WHERE user_id = ?'
+)
+SQLITE_HAS_STATS = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_stats'"
+# Recompute every user's aggregates in one grouped scan of the tasks
+SQLITE_REBUILD_STATS = (
+    'DELETE FROM user_stats',
+    '''INSERT INTO user_stats SELECT
+        user_id,
+        SUM(status = 'pending'),
+        SUM(status = 'in-progress'),
+        SUM(status = 'completed'),
+        SUM(duration),
+        SUM((status != 'completed') * duration),
+        TOTAL(CASE WHEN status = 'completed' AND completed_at IS NOT NULL
+              THEN (julianday(completed_at) - julianday(created_at)) * 86400 END),
+        SUM(status = 'completed' AND completed_at IS NOT NULL)
+    FROM tasks WHERE user_id IS NOT NULL GROUP BY user_id''',
+)
+
+
+# Turn a users row into a User record
+def _user_from_row(row):
+    return User(*row) if row is not None else None
+
+
+# Turn a tasks row into a Task record (timestamps are stored as ISO text)
+def _task_from_row(row):
+    if row is None:
+        return None
+    task_id, user_id, title, description, status, duration, created_at, updated_at, completed_at = row
+    return Task(
+        task_id, user_id, title, description, TaskStatus(status), duration,
+        parse_timestamp(created_at), parse_timestamp(updated_at), parse_timestamp(completed_at)
+    )
+
+
+# Convert a changed task value to the form stored in its column
+def _column_value(value):
+    if isinstance(value, TaskStatus):
+        return value.value
+    if value is not None and not isinstance(value, (str, int)):
+        return format_timestamp(value)
+    return value
+
+
+# Return the users row to insert for validated payload fields
+def _user_row(fields):
+    return (
+        fields['firstName'], fields['lastName'], fields['email'], fields['phone'],
+        index_key(fields['email']), index_key(fields['phone'])
+    )
+
+
+# Return the tasks row to insert for the task fields built by the handlers
+def _task_row(fields):
+    return (
+        fields['user_id'], fields['title'], fields['description'], TaskStatus(fields['status']).value,
+        fields['duration'], format_timestamp(fields['created_at']), format_timestamp(fields['updated_at']),
+        format_timestamp(fields['completed_at']), index_key(fields['title'])
+    )
+
+
+# Split 'values' into lists small enough for one IN (...) query
+def _chunks(values, size=SQLITE_MAX_PARAMETERS):
+    values = list(values)
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+# Store records in a SQLite database file shared by every worker process
+class SQLiteStore(Store):
+    name = 'sqlite'
+
+    def __init__(self, path):
+        self.path = path
+        # Each thread gets its own connection (sqlite3 connections must not be shared)
+        self._local = threading.local()
+        # Create the schema once, up front
+        connection = self._connection()
+        # Databases created before the aggregates existed get them computed once
+        had_stats = connection.execute(SQLITE_HAS_STATS).fetchone() is not None
+        for statement in SQLITE_SCHEMA:
+            connection.execute(statement)
+        columns = [row[1] for row in connection.execute('PRAGMA table_info(tasks)')]
+        if 'version' not in columns:
+            try:
+                connection.execute(SQLITE_ADD_VERSION)
+            except sqlite3.OperationalError as error:
+                # Another worker added it first
+                if 'duplicate column' not in str(error):
+                    raise
+        if not had_stats:
+            self.rebuild_stats()
+        # Versions live in the database and ids are never reused, so ETags need no extra token
+        self.epoch = 'db'
+
+    # Return this thread's connection, opening it on first use
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # 'isolation_level=None' leaves transactions under our control;
+            # 'timeout' makes a writer wait for a busy database instead of failing
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=256)
+            # WAL lets readers in other workers run while one worker writes
+            connection.execute('PRAGMA journal_mode=WAL')
+            # With WAL, NORMAL only syncs at checkpoints and is still crash-safe
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute('PRAGMA foreign_keys=ON')
+            self._local.connection = connection
+        return connection
+
+    # Map a UNIQUE constraint failure back to the field that caused it
+    @staticmethod
+    def _duplicate_error(error, table, record):
+        for field in ('email', 'phone', 'title'):
+            if f'{table}.{field}_key' in str(error):
+                return DuplicateRecordError(table, field, record[field])
+        return None
+
+    # Run 'statement' for every row of 'rows' in one transaction and return the new IDs
+    def _insert_many(self, table, statement, rows, records):
+        connection = self._connection()
+        if not rows:
+            return []
+        # BEGIN IMMEDIATE holds the write lock for the whole batch, so the
+        # AUTOINCREMENT IDs it receives are consecutive
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(statement, rows)
+            last_id = connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+            connection.execute('COMMIT')
+        except sqlite3.IntegrityError as error:
+            connection.execute('ROLLBACK')
+            # SQLite names the constraint but not the row, so find the clashing record ourselves
+            for field in ('email', 'phone', 'title'):
+                if f'{table}.{field}_key' in str(error):
+                    duplicate = self._find_duplicate(table, field, records)
+                    if duplicate is not None:
+                        raise duplicate from error
+            raise
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    # Find the record of 'records' whose 'field' clashes with the store or with an earlier record
+    def _find_duplicate(self, table, field, records):
+        taken = self.existing_keys(table, field, [record[field] for record in records])
+        seen = set()
+        for record in records:
+            key = index_key(record[field])
+            if key in taken or key in seen:
+                return DuplicateRecordError(table, field, record[field])
+            seen.add(key)
+        return None
+
+    # Insert one row with 'statement' and return its new ID
+    def _insert(self, table, statement, row, fields):
+        try:
+            return self._connection().execute(statement, row).lastrowid
+        except sqlite3.IntegrityError as error:
+            duplicate = self._duplicate_error(error, table, fields)
+            if duplicate is None:
+                raise
+            raise duplicate from error
+
+    def add_user(self, fields):
+        return new_user(self._insert('users', SQLITE_INSERT_USER, _user_row(fields), fields), fields)
+
+    def add_task(self, fields):
+        return new_task(self._insert('tasks', SQLITE_INSERT_TASK, _task_row(fields), fields), fields)
+
+    def add_users(self, fields_list):
+        rows = [_user_row(fields) for fields in fields_list]
+        ids = self._insert_many('users', SQLITE_INSERT_USER, rows, fields_list)
+        return [new_user(user_id, fields) for user_id, fields in zip(ids, fields_list)]
+
+    def add_tasks(self, fields_list):
+        rows = [_task_row(fields) for fields in fields_list]
+        ids = self._insert_many('tasks', SQLITE_INSERT_TASK, rows, fields_list)
+        return [new_task(task_id, fields) for task_id, fields in zip(ids, fields_list)]
+
+    def get_user(self, user_id):
+        return _user_from_row(self._connection().execute(SQLITE_SELECT_USER, (user_id,)).fetchone())
+
+    def get_task(self, task_id):
+        return _task_from_row(self._connection().execute(SQLITE_SELECT_TASK, (task_id,)).fetchone())
+
+    # sqlite3 can't bind integers beyond int64; no record has such an id
+    def has_user(self, user_id):
+        if user_id > MAX_INT64:
+            return False
+        return self._connection().execute(SQLITE_HAS_USER, (user_id,)).fetchone() is not None
+
+    def version(self, table, record_id):
+        if table == 'users':
+            return 1 if self.has_user(record_id) else None
+        row = self._connection().execute(SQLITE_TASK_VERSION, (record_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def get_versioned(self, table, record_id):
+        if table == 'users':
+            user = self.get_user(record_id)
+            return (user, 1) if user is not None else (None, None)
+        # One statement reads the row and its version together
+        row = self._connection().execute(SQLITE_VERSIONED_TASK, (record_id,)).fetchone()
+        if row is None:
+            return None, None
+        return _task_from_row(row[:-1]), row[-1]
+
+    def is_unique(self, table, field, value):
+        query = SQLITE_UNIQUE_LOOKUPS[(table, field)]
+        return self._connection().execute(query, (index_key(value),)).fetchone() is None
+
+    # Run an IN (...) query for every chunk of 'values' and collect the 'key' column
+    def _collect_keys(self, query, values):
+        connection = self._connection()
+        found = set()
+        for chunk in _chunks(values):
+            placeholders = ', '.join('?' * len(chunk))
+            found.update(row[0] for row in connection.execute(query.format(placeholders), chunk))
+        return found
+
+    def existing_keys(self, table, field, values):
+        return self._collect_keys(SQLITE_EXISTING_KEYS[(table, field)], {index_key(value) for value in values})
+
+    def existing_user_ids(self, user_ids):
+        return self._collect_keys(SQLITE_EXISTING_USERS, {user_id for user_id in user_ids if user_id <= MAX_INT64})
+
+    # Apply 'changes' to one task inside the caller's transaction and return the updated
+    # record (None when the task does not exist; TaskCompletedError once it is completed)
+    @staticmethod
+    def _update_row(connection, task_id, changes):
+        # Only whitelisted column names are ever interpolated into the statement
+        columns = [column for column in TASK_UPDATABLE if column in changes]
+        # Every change bumps the task's version
+        assignments = ''.join(f'{column} = ?, ' for column in columns) + 'version = version + 1'
+        # The 'status' condition enforces "no change after completion" inside the database
+        cursor = connection.execute(
+            f"UPDATE tasks SET {assignments} WHERE id = ? AND status != 'completed'",
+            [_column_value(changes[column]) for column in columns] + [task_id]
+        )
+        if cursor.rowcount == 0:
+            if connection.execute(SQLITE_TASK_STATUS, (task_id,)).fetchone() is None:
+                return None
+            raise TaskCompletedError(task_id)
+        return _task_from_row(connection.execute(SQLITE_SELECT_TASK, (task_id,)).fetchone())
+
+    def update_task(self, task_id, changes):
+        connection = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front, so the guarded update and
+        # the read of the result happen without another writer in between
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            task = self._update_row(connection, task_id, changes)
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        return task
+
+    def update_tasks(self, updates):
+        connection = self._connection()
+        # One transaction (and one commit) for the whole batch instead of one per task;
+        # a refused update doesn't touch the database, so the others can still commit
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            outcomes = []
+            for task_id, changes in updates:
+                try:
+                    outcomes.append(self._update_row(connection, task_id, changes))
+                except TaskCompletedError as error:
+                    outcomes.append(error)
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        return outcomes
+
+    def user_stats(self, user_id):
+        row = self._connection().execute(SQLITE_SELECT_STATS, (user_id,)).fetchone()
+        return UserStats(*row) if row is not None else UserStats()
+
+    def rebuild_stats(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for statement in SQLITE_REBUILD_STATS:
+                connection.execute(statement)
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+
+    def list_tasks(self, status=None, user_id=None, after=0, limit=20):
+        conditions = ['id > ?']
+        parameters = [after]
+        if status is not None:
+            conditions.append('status = ?')
+            parameters.append(TaskStatus(status).value)
+        if user_id is not None:
+            conditions.append('user_id = ?')
+            parameters.append(user_id)
+        parameters.append(limit)
+        rows = self._connection().execute(
+            f"SELECT {SQLITE_TASK_COLUMNS} FROM tasks WHERE {' AND '.join(conditions)} ORDER BY id LIMIT ?",
+            parameters
+        ).fetchall()
+        return [_task_from_row(row) for row in rows]
+
+    def export(self, table, chunk_size=1000):
+        columns, from_row = {
+            'users': (SQLITE_USER_COLUMNS, _user_from_row),
+            'tasks': (SQLITE_TASK_COLUMNS, _task_from_row),
+        }[table]
+        # Use a dedicated connection: its read transaction pins one WAL snapshot
+        # for the whole export while other connections keep writing
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        try:
+            connection.execute('BEGIN')
+            cursor = connection.execute(f'SELECT {columns} FROM {table} ORDER BY id')
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from map(from_row, rows)
+            connection.execute('COMMIT')
+        finally:
+            connection.close()
+
+    def count(self, table):
+        if table not in ('users', 'tasks'):
+            raise ValueError(f"Unknown table '{table}'")
+        return self._connection().execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
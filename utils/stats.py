@@ -0,0 +1,163 @@
+# Running per-user task aggregates
+# Each user's task counts by status, total and remaining duration and completion times are
+# kept up to date as tasks are created and change status, so reading them is O(1) instead of
+# a scan over every task. rebuild_stats recomputes them from scratch in one pass (with NumPy
+# when it is installed), e.g. after the memory store is restored from its journal.
+from dataclasses import dataclass
+
+from utils.models import TaskStatus
+
+
+# The aggregates of one user's tasks
+@dataclass(slots=True)
+class UserStats:
+    pending: int = 0
+    in_progress: int = 0
+    completed: int = 0
+    # Minutes of every task, and of the tasks not completed yet
+    total_duration: int = 0
+    remaining_duration: int = 0
+    # Seconds from created_at to completed_at, summed over the completed tasks that have both
+    completion_seconds: float = 0.0
+    timed_completions: int = 0
+
+    # Return an independent copy of the aggregates
+    def copy(self):
+        return UserStats(
+            self.pending, self.in_progress, self.completed, self.total_duration,
+            self.remaining_duration, self.completion_seconds, self.timed_completions
+        )
+
+
+# UserStats counter for each status
+STATUS_FIELDS = {
+    TaskStatus.PENDING: 'pending',
+    TaskStatus.IN_PROGRESS: 'in_progress',
+    TaskStatus.COMPLETED: 'completed',
+}
+
+
+# Return the seconds a completed task took, or None when it has no completion time
+def completion_seconds(task):
+    if task.completed_at is None or task.created_at is None:
+        return None
+    return (task.completed_at - task.created_at).total_seconds()
+
+
+# Add a completed task's completion time to 'stats'
+def _add_completion(stats, task):
+    seconds = completion_seconds(task)
+    if seconds is not None:
+        stats.completion_seconds += seconds
+        stats.timed_completions += 1
+
+
+# Count a new task in 'stats'
+def count_task(stats, task):
+    field = STATUS_FIELDS[task.status]
+    setattr(stats, field, getattr(stats, field) + 1)
+    stats.total_duration += task.duration
+    if task.status is TaskStatus.COMPLETED:
+        _add_completion(stats, task)
+    else:
+        stats.remaining_duration += task.duration
+
+
+# Move a task that changed from 'old_status' to its current status in 'stats'
+def count_status_change(stats, task, old_status):
+    old_field = STATUS_FIELDS[old_status]
+    new_field = STATUS_FIELDS[task.status]
+    setattr(stats, old_field, getattr(stats, old_field) - 1)
+    setattr(stats, new_field, getattr(stats, new_field) + 1)
+    # Tasks never leave 'completed', so only the move into it changes the durations
+    if task.status is TaskStatus.COMPLETED and old_status is not TaskStatus.COMPLETED:
+        stats.remaining_duration -= task.duration
+        _add_completion(stats, task)
+
+
+# Recompute the aggregates of every user from 'tasks' and return them by user id
+def rebuild_stats(tasks):
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    if numpy is None:
+        return _rebuild_in_python(tasks)
+    return _rebuild_with_numpy(numpy, tasks)
+
+
+# Single-pass rebuild: count_task with the status branches spelled out, since this loop
+# runs once per task on every warm start
+def _rebuild_in_python(tasks):
+    stats = {}
+    for task in tasks:
+        user_id = task.user_id
+        if user_id is None:
+            continue
+        user_stats = stats.get(user_id)
+        if user_stats is None:
+            user_stats = stats[user_id] = UserStats()
+        user_stats.total_duration += task.duration
+        status = task.status
+        if status is TaskStatus.COMPLETED:
+            user_stats.completed += 1
+            _add_completion(user_stats, task)
+        else:
+            user_stats.remaining_duration += task.duration
+            if status is TaskStatus.PENDING:
+                user_stats.pending += 1
+            else:
+                user_stats.in_progress += 1
+    return stats
+
+
+# Vectorized rebuild: one column array per task attribute, then one bincount per aggregate
+def _rebuild_with_numpy(numpy, tasks):
+    owned = [task for task in tasks if task.user_id is not None]
+    if not owned:
+        return {}
+    statuses = list(STATUS_FIELDS)
+    user_ids = numpy.fromiter((task.user_id for task in owned), dtype=numpy.int64, count=len(owned))
+    status_codes = numpy.fromiter((statuses.index(task.status) for task in owned), dtype=numpy.int8, count=len(owned))
+    durations = numpy.fromiter((task.duration for task in owned), dtype=numpy.int64, count=len(owned))
+    seconds = numpy.fromiter(
+        (numpy.nan if completion_seconds(task) is None else completion_seconds(task) for task in owned),
+        dtype=numpy.float64, count=len(owned)
+    )
+
+    # Map user ids to dense positions so bincount only spans the users that own tasks
+    users, positions = numpy.unique(user_ids, return_inverse=True)
+    size = len(users)
+    completed = status_codes == statuses.index(TaskStatus.COMPLETED)
+    timed = completed & ~numpy.isnan(seconds)
+    counts = [numpy.bincount(positions[status_codes == code], minlength=size) for code in range(len(statuses))]
+    total = numpy.bincount(positions, weights=durations, minlength=size)
+    remaining = numpy.bincount(positions[~completed], weights=durations[~completed], minlength=size)
+    completion = numpy.bincount(positions[timed], weights=seconds[timed], minlength=size)
+    timed_counts = numpy.bincount(positions[timed], minlength=size)
+
+    return {
+        int(user_id): UserStats(
+            int(counts[0][n]), int(counts[1][n]), int(counts[2][n]), int(total[n]),
+            int(remaining[n]), float(completion[n]), int(timed_counts[n])
+        )
+        for n, user_id in enumerate(users)
+    }
+
+
+# Format the aggregates of 'user_id' for the API response
+def format_stats(user_id, stats):
+    return {
+        'user_id': user_id,
+        'tasks': stats.pending + stats.in_progress + stats.completed,
+        'by_status': {
+            TaskStatus.PENDING.value: stats.pending,
+            TaskStatus.IN_PROGRESS.value: stats.in_progress,
+            TaskStatus.COMPLETED.value: stats.completed,
+        },
+        'total_duration': stats.total_duration,
+        'remaining_duration': stats.remaining_duration,
+        'average_completion_seconds': (
+            stats.completion_seconds / stats.timed_completions if stats.timed_completions else None
+        ),
+    }
@@ -0,0 +1,639 @@
+# Storage backends for users and tasks
+# The route handlers talk to a store object instead of touching dictionaries directly,
+# so the same API can run on the in-memory dictionaries or on a shared SQLite file.
+# The SQLite backend lives in utils/sqlite_store.py, and the journal and cold tier are
+# opened by create_store; each is imported only when the configuration asks for it.
+import heapq
+import itertools
+import os
+import secrets
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from utils.indexes import UniqueIndex, SortedIdIndex, index_key
+from utils.entries import user_entry, task_entry, status_entry, archive_entry
+from utils.locks import StripedLock
+from utils.models import User, Task, TaskStatus
+from utils.stats import UserStats, count_task, count_status_change, rebuild_stats
+from utils.validators import validate_unique_field
+
+
+# Raised when an insert would break a uniqueness rule (email, phone or title)
+class DuplicateRecordError(ValueError):
+    def __init__(self, table, field, value):
+        super().__init__(f"{table}.{field} '{value}' already exists")
+        # Keep the details so the caller can build its own error message
+        self.table = table
+        self.field = field
+        self.value = value
+
+
+# Raised when a caller tries to change a task that is already completed
+class TaskCompletedError(ValueError):
+    def __init__(self, task_id):
+        super().__init__(f"Task with id {task_id} is already marked as completed")
+        self.task_id = task_id
+
+
+# Build a User record from validated payload fields
+def new_user(user_id, fields):
+    return User(user_id, fields['firstName'], fields['lastName'], fields['email'], fields['phone'])
+
+
+# Build a Task record from the task fields built by the handlers
+def new_task(task_id, fields):
+    return Task(
+        task_id, fields['user_id'], fields['title'], fields['description'],
+        TaskStatus(fields['status']), fields['duration'], fields['created_at'],
+        fields['updated_at'], fields['completed_at']
+    )
+
+
+# Task fields a caller may change through update_task
+TASK_UPDATABLE = ('status', 'updated_at', 'completed_at')
+
+
+# Apply a dictionary of changes to a Task record
+def apply_task_changes(task, changes):
+    for field in TASK_UPDATABLE:
+        if field in changes:
+            value = changes[field]
+            setattr(task, field, TaskStatus(value) if field == 'status' else value)
+
+
+# The interface every storage backend implements
+class Store:
+    # Name used in configuration and benchmark output
+    name = None
+
+    # Insert a new user built from 'fields' and return the stored record
+    def add_user(self, fields):
+        raise NotImplementedError
+
+    # Insert a new task built from 'fields' and return the stored record
+    def add_task(self, fields):
+        raise NotImplementedError
+
+    # Return the user with 'user_id', or None when it does not exist
+    def get_user(self, user_id):
+        raise NotImplementedError
+
+    # Return the task with 'task_id', or None when it does not exist
+    def get_task(self, task_id):
+        raise NotImplementedError
+
+    # Check if a user with 'user_id' exists
+    def has_user(self, user_id):
+        return self.get_user(user_id) is not None
+
+    # Return the version of a record of 'table' ('users' or 'tasks'), or None when it
+    # does not exist. A record starts at version 1 and every change bumps it; users
+    # never change, so they stay at 1
+    def version(self, table, record_id):
+        raise NotImplementedError
+
+    # Return (record, version) of a record of 'table' read in one step, or (None, None)
+    def get_versioned(self, table, record_id):
+        raise NotImplementedError
+
+    # Insert several users at once; either all of them are stored or none is
+    def add_users(self, fields_list):
+        raise NotImplementedError
+
+    # Insert several tasks at once; either all of them are stored or none is
+    def add_tasks(self, fields_list):
+        raise NotImplementedError
+
+    # Check that no record in 'table' already uses 'value' for 'field'
+    def is_unique(self, table, field, value):
+        raise NotImplementedError
+
+    # Return the set of case-folded 'values' already used for 'field' in 'table'
+    def existing_keys(self, table, field, values):
+        raise NotImplementedError
+
+    # Return the subset of 'user_ids' that belong to existing users
+    def existing_user_ids(self, user_ids):
+        return {user_id for user_id in user_ids if self.has_user(user_id)}
+
+    # Apply 'changes' to the task with 'task_id' and return the updated record
+    # (None when the task does not exist; TaskCompletedError once it is completed)
+    def update_task(self, task_id, changes):
+        raise NotImplementedError
+
+    # Apply several (task_id, changes) updates; each one succeeds or fails on its own
+    # Returns one outcome per update: the updated record, None when the task does not
+    # exist, or the TaskCompletedError that refused the change
+    def update_tasks(self, updates):
+        outcomes = []
+        for task_id, changes in updates:
+            try:
+                outcomes.append(self.update_task(task_id, changes))
+            except TaskCompletedError as error:
+                outcomes.append(error)
+        return outcomes
+
+    # Return up to 'limit' tasks with an id greater than 'after', in id order,
+    # optionally only those with the given 'status' and/or 'user_id'
+    def list_tasks(self, status=None, user_id=None, after=0, limit=20):
+        raise NotImplementedError
+
+    # Yield every record of 'table' in id order, one at a time
+    # Records created after the export started are left out, so the export
+    # is a stable snapshot even while requests keep writing
+    def export(self, table, chunk_size=1000):
+        raise NotImplementedError
+
+    # Return the number of records in 'table'
+    def count(self, table):
+        raise NotImplementedError
+
+    # Return the UserStats aggregates of the tasks owned by 'user_id' (all zero when it has none)
+    def user_stats(self, user_id):
+        raise NotImplementedError
+
+    # Recompute the aggregates of every user from the stored tasks
+    def rebuild_stats(self):
+        raise NotImplementedError
+
+    # Return (table, field, indexed values, lookups, hits) for every unique index the store
+    # keeps itself (stores that rely on database indexes return an empty list)
+    def index_stats(self):
+        return []
+
+    # Release any resources held by the store
+    def close(self):
+        pass
+
+
+# Store records in plain dictionaries (fast, but lost on restart)
+# The store is safe to share between request threads:
+# - IDs come from itertools.count, whose next() is atomic, so no lock is needed to allocate them
+# - the check-then-insert of unique fields holds the striped locks of the values being inserted,
+#   so only requests competing for the same email/phone/title wait on each other
+# - task updates hold the striped lock of the task id
+# - the per-user aggregates are guarded by a striped lock of the user id, always taken last
+# With a journal attached (see utils/journal.py) every change is logged before it becomes visible.
+# With a cold tier attached (see utils/archive.py) old completed tasks move out of the dictionaries
+# and indexes; reads by id, listings, exports and title checks then consult both tiers.
+class MemoryStore(Store):
+    name = 'memory'
+
+    def __init__(self, stripes=64):
+        # 'users' and 'tasks' map record ids to User and Task records
+        self.users = {}
+        self.tasks = {}
+        # Auto-incrementing ID counters for users and tasks
+        self.user_ids = itertools.count(1)
+        self.task_ids = itertools.count(1)
+        # Striped locks guarding unique values and task records
+        self.unique_locks = StripedLock(stripes)
+        self.task_locks = StripedLock(stripes)
+        # Unique indexes for every field that must not repeat, grouped by table
+        self.indexes = {
+            'users': {'email': UniqueIndex('email'), 'phone': UniqueIndex('phone')},
+            'tasks': {'title': UniqueIndex('title')},
+        }
+        # Record ids in id order, for paginated listing and exports:
+        # all users, and tasks filed by status, by owner and by both
+        self.listings = SortedIdIndex()
+        # Running task aggregates of every user that owns tasks (see utils/stats.py)
+        self.user_aggregates = {}
+        self.stats_locks = StripedLock(stripes)
+        # Optional write-ahead journal (set by utils.journal.open_journal)
+        self.journal = None
+        # Optional cold tier for old completed tasks (set by attach_archive), and the
+        # (completion time, task id) of the completed tasks still in the hot tier, oldest first
+        self.archive = None
+        self.completions = deque()
+        self.archiving = threading.Lock()
+        # Versions of the tasks changed since they were created (sparse: absent means 1)
+        self.versions = {}
+        # Versions restart with the process, so ETags carry a token of this store instance
+        self.epoch = secrets.token_hex(4)
+
+    # Raise DuplicateRecordError if 'record' clashes with an indexed field of 'table'
+    def _check_unique(self, table, record):
+        for field, index in self.indexes[table].items():
+            value = getattr(record, field)
+            if value in index:
+                raise DuplicateRecordError(table, field, value)
+        # Titles of archived tasks stay taken
+        if table == 'tasks' and self.archive is not None and self.archive.has_title(record.title):
+            raise DuplicateRecordError(table, 'title', record.title)
+
+    # Register 'record' in every index of 'table'
+    def _index(self, table, record):
+        for index in self.indexes[table].values():
+            index.add(record)
+        if table == 'tasks':
+            for key in self._list_keys(record.status, record.user_id):
+                self.listings.add(key, record.id)
+            if record.user_id is not None:
+                with self.stats_locks.hold(record.user_id):
+                    count_task(self.user_aggregates.setdefault(record.user_id, UserStats()), record)
+            if self.archive is not None and record.status is TaskStatus.COMPLETED:
+                self.completions.append((record.completed_at or record.created_at, record.id))
+        else:
+            self.listings.add(('users',), record.id)
+
+    # Return the listing keys a task with 'status' owned by 'user_id' is filed under
+    @staticmethod
+    def _list_keys(status, user_id):
+        if user_id is None:
+            return (('all',), ('status', status))
+        return (('all',), ('status', status), ('user', user_id), ('user_status', user_id, status))
+
+    # Return the listing key that answers a query for 'status' and/or 'user_id'
+    @staticmethod
+    def _list_key(status, user_id):
+        # Keys hold TaskStatus members, which hash differently from plain strings
+        if status is not None:
+            status = TaskStatus(status)
+        if status is not None and user_id is not None:
+            return ('user_status', user_id, status)
+        if status is not None:
+            return ('status', status)
+        if user_id is not None:
+            return ('user', user_id)
+        return ('all',)
+
+    # Return the striped-lock keys for the unique values of 'record'
+    def _unique_keys(self, table, record):
+        return [(field, index_key(getattr(record, field))) for field in self.indexes[table]]
+
+    # Check uniqueness, allocate an ID and insert 'record' into 'table' as one atomic step
+    def _insert(self, table, record, ids):
+        with self.unique_locks.hold_many(self._unique_keys(table, record)):
+            self._check_unique(table, record)
+            # Allocate the ID only once the record is known to be valid, so IDs have no gaps
+            record.id = next(ids)
+            # Log the record before it is visible, so a later status change is always logged after it
+            if self.journal is not None:
+                self.journal.append(self._journal_entry(table, record))
+            getattr(self, table)[record.id] = record
+            self._index(table, record)
+        return record
+
+    # Check uniqueness and insert every record of 'records' into 'table', all or nothing
+    def _insert_many(self, table, records, ids):
+        keys = [key for record in records for key in self._unique_keys(table, record)]
+        with self.unique_locks.hold_many(keys):
+            # Check the whole batch (against the store and against itself) before inserting anything
+            seen = set()
+            for record in records:
+                self._check_unique(table, record)
+                for key in self._unique_keys(table, record):
+                    if key in seen:
+                        raise DuplicateRecordError(table, key[0], getattr(record, key[0]))
+                    seen.add(key)
+            rows = getattr(self, table)
+            for record in records:
+                record.id = next(ids)
+                if self.journal is not None:
+                    self.journal.append(self._journal_entry(table, record))
+                rows[record.id] = record
+                self._index(table, record)
+        return records
+
+    # Return the journal entry that records a new 'record' of 'table'
+    @staticmethod
+    def _journal_entry(table, record):
+        return task_entry(record) if table == 'tasks' else user_entry(record)
+
+    def add_user(self, fields):
+        return self._insert('users', new_user(None, fields), self.user_ids)
+
+    def add_task(self, fields):
+        return self._insert('tasks', new_task(None, fields), self.task_ids)
+
+    def add_users(self, fields_list):
+        return self._insert_many('users', [new_user(None, fields) for fields in fields_list], self.user_ids)
+
+    def add_tasks(self, fields_list):
+        return self._insert_many('tasks', [new_task(None, fields) for fields in fields_list], self.task_ids)
+
+    def get_user(self, user_id):
+        return self.users.get(user_id)
+
+    def get_task(self, task_id):
+        task = self.tasks.get(task_id)
+        if task is None and self.archive is not None:
+            return self.archive.get(task_id)
+        return task
+
+    def has_user(self, user_id):
+        return user_id in self.users
+
+    def version(self, table, record_id):
+        if record_id not in getattr(self, table):
+            if table == 'tasks' and self.archive is not None:
+                return self.archive.version(record_id)
+            return None
+        return self.versions.get(record_id, 1) if table == 'tasks' else 1
+
+    def get_versioned(self, table, record_id):
+        if table == 'users':
+            user = self.users.get(record_id)
+            return (user, 1) if user is not None else (None, None)
+        # The task's lock keeps an update from landing between the copy and the version read
+        with self.task_locks.hold(record_id):
+            task = self.tasks.get(record_id)
+            if task is not None:
+                return task.copy(), self.versions.get(record_id, 1)
+        if self.archive is not None:
+            return self.archive.get_versioned(record_id)
+        return None, None
+
+    def is_unique(self, table, field, value):
+        if not validate_unique_field(getattr(self, table), field, value, self.indexes[table].get(field)):
+            return False
+        return not (table == 'tasks' and self.archive is not None and self.archive.has_title(value))
+
+    def existing_keys(self, table, field, values):
+        index = self.indexes[table][field]
+        keys = [index_key(value) for value in values]
+        found = {key for key in keys if key in index.keys}
+        index.count_lookups(len(keys), len(found))
+        if table == 'tasks' and self.archive is not None:
+            found |= self.archive.existing_titles([key for key in keys if key not in found])
+        return found
+
+    def existing_user_ids(self, user_ids):
+        return {user_id for user_id in user_ids if user_id in self.users}
+
+    def update_task(self, task_id, changes):
+        # Hold the task's lock so the completed check and the update can't interleave
+        with self.task_locks.hold(task_id):
+            task = self.tasks.get(task_id)
+            if task is None:
+                # Archived tasks are completed, so they refuse changes like any other completed task
+                if self.archive is not None and self.archive.version(task_id) is not None:
+                    raise TaskCompletedError(task_id)
+                return None
+            if task.status is TaskStatus.COMPLETED:
+                raise TaskCompletedError(task_id)
+            old_status = task.status
+            apply_task_changes(task, changes)
+            self.versions[task_id] = self.versions.get(task_id, 1) + 1
+            # Re-file the task under its new status in the listing indexes
+            if task.status is not old_status:
+                for old_key, new_key in zip(self._list_keys(old_status, task.user_id),
+                                            self._list_keys(task.status, task.user_id)):
+                    self.listings.move(old_key, new_key, task_id)
+                if task.user_id is not None:
+                    with self.stats_locks.hold(task.user_id):
+                        count_status_change(self.user_aggregates[task.user_id], task, old_status)
+                if self.archive is not None and task.status is TaskStatus.COMPLETED:
+                    self.completions.append((task.completed_at or task.created_at, task_id))
+            if self.journal is not None:
+                self.journal.append(status_entry(task))
+            # Return a copy so the caller formats a consistent view of the record
+            return task.copy()
+
+    def list_tasks(self, status=None, user_id=None, after=0, limit=20):
+        ids = self.listings.page(self._list_key(status, user_id), after, limit)
+        # Only the page's records are touched, never the rest of 'tasks'
+        # (one get per id: the archiver may remove a task between a membership test and a read)
+        tasks = [task.copy() for task in map(self.tasks.get, ids) if task is not None]
+        # Archived tasks are all completed, so they only join unfiltered and 'completed' listings;
+        # the cold page is read after the hot one, so a task archived in between is not lost
+        if self.archive is not None and (status is None or TaskStatus(status) is TaskStatus.COMPLETED):
+            archived = self.archive.page(after, limit, user_id)
+            if archived:
+                merged = {task.id: task for task in archived}
+                merged.update((task.id, task) for task in tasks)
+                tasks = [merged[task_id] for task_id in sorted(merged)[:limit]]
+        return tasks
+
+    # 'include_archived=False' leaves the cold tier out (used by journal snapshots)
+    def export(self, table, chunk_size=1000, include_archived=True):
+        records = self._export_hot(table, chunk_size)
+        if table == 'tasks' and include_archived and self.archive is not None:
+            return self._merge_archived(records, self.archive.tasks(chunk_size))
+        return records
+
+    # Merge two task streams in id order
+    @staticmethod
+    def _merge_archived(hot, cold):
+        last_id = None
+        for task in heapq.merge(hot, cold, key=lambda task: task.id):
+            # A task moving between the tiers mid-export can show up in both
+            if task.id != last_id:
+                yield task
+            last_id = task.id
+
+    def _export_hot(self, table, chunk_size):
+        key = ('all',) if table == 'tasks' else ('users',)
+        rows = getattr(self, table)
+        # Stop at the newest id that exists right now
+        last_id = self.listings.last(key)
+        after = 0
+        while last_id is not None and after < last_id:
+            # Walk the id list a chunk at a time so memory stays flat
+            ids = self.listings.page(key, after, chunk_size)
+            if not ids:
+                break
+            for record_id in ids:
+                if record_id > last_id:
+                    return
+                record = rows.get(record_id)
+                if record is not None:
+                    # Copy the record so a concurrent update can't change it mid-write
+                    yield record.copy()
+            after = ids[-1]
+
+    def count(self, table):
+        if table == 'tasks' and self.archive is not None:
+            return len(self.tasks) + len(self.archive)
+        return len(getattr(self, table))
+
+    def user_stats(self, user_id):
+        with self.stats_locks.hold(user_id):
+            stats = self.user_aggregates.get(user_id)
+            return stats.copy() if stats is not None else UserStats()
+
+    def rebuild_stats(self):
+        # With every writer held off, the tasks can't change while they are counted
+        with self.hold_writes():
+            self.user_aggregates = rebuild_stats(self._all_tasks())
+
+    # Return every task of both tiers
+    def _all_tasks(self):
+        if self.archive is None:
+            return self.tasks.values()
+        return itertools.chain(self.tasks.values(), self.archive.tasks())
+
+    def index_stats(self):
+        stats = [
+            (table, field, len(index), index.lookups, index.hits)
+            for table, fields in self.indexes.items()
+            for field, index in fields.items()
+        ]
+        if self.archive is not None:
+            stats.append(('tasks', 'archived_title', len(self.archive), self.archive.lookups, self.archive.hits))
+        return stats
+
+    # Attach the cold tier 'archive' (see utils/archive.py)
+    def attach_archive(self, archive):
+        self.archive = archive
+        self._track_completions()
+
+    # Queue the completed hot tasks by completion time and continue the task ids after
+    # both tiers (used when a cold tier is attached and after a restore)
+    def _track_completions(self):
+        completed = [
+            (task.completed_at or task.created_at, task.id)
+            for task in self.tasks.values() if task.status is TaskStatus.COMPLETED
+        ]
+        self.completions = deque(sorted(completed))
+        self.task_ids = itertools.count(max(max(self.tasks, default=0), self.archive.last_id()) + 1)
+
+    # Move the tasks completed before 'cutoff' to the cold tier, 'batch_size' at a time,
+    # and return how many were moved
+    def archive_completed(self, cutoff, batch_size=500):
+        moved = 0
+        with self.archiving:
+            while True:
+                # Completions are queued as they happen, so the oldest ones are at the front
+                batch = []
+                while self.completions and len(batch) < batch_size and self.completions[0][0] <= cutoff:
+                    batch.append(self.completions.popleft()[1])
+                if not batch:
+                    return moved
+                moved += self._archive_batch(batch)
+
+    def _archive_batch(self, task_ids):
+        tasks = [self.tasks[task_id] for task_id in task_ids if task_id in self.tasks]
+        # Completed tasks never change, so they are written out (and fsynced) before any lock is taken
+        locations = self.archive.write(tasks)
+        keys = [key for task in tasks for key in self._unique_keys('tasks', task)]
+        # Holding the titles' locks makes the switch between tiers atomic for uniqueness checks
+        with self.unique_locks.hold_many(keys), self.task_locks.hold_many(task_ids):
+            entries = [
+                (task, self.versions.get(task.id, 1), location)
+                for task, location in zip(tasks, locations) if self.tasks.get(task.id) is task
+            ]
+            # The cold copy becomes readable before the hot one goes away, so reads never miss it
+            self.archive.register(entries)
+            moved = [task for task, _, _ in entries]
+            if self.journal is not None:
+                for task in moved:
+                    self.journal.append(archive_entry(task))
+            self._unindex_tasks(moved)
+        return len(moved)
+
+    # Remove 'tasks' from the hot dictionaries and indexes
+    def _unindex_tasks(self, tasks):
+        pairs = []
+        for task in tasks:
+            del self.tasks[task.id]
+            for index in self.indexes['tasks'].values():
+                index.remove(task)
+            self.versions.pop(task.id, None)
+            pairs.extend((key, task.id) for key in self._list_keys(task.status, task.user_id))
+        self.listings.remove_many(pairs)
+
+    # Hold every lock taken by writers, so no insert or update is half done
+    @contextmanager
+    def hold_writes(self):
+        with self.unique_locks.hold_all(), self.task_locks.hold_all():
+            yield
+
+    # Put 'record' into 'table' as it is, replacing any record with the same id
+    # (used by journal replay; the listings are rebuilt once by finish_restore)
+    def restore(self, table, record):
+        rows = getattr(self, table)
+        old = rows.get(record.id)
+        if old is not None:
+            for index in self.indexes[table].values():
+                index.remove(old)
+        rows[record.id] = record
+        for index in self.indexes[table].values():
+            index.add(record)
+
+    # Put many restored records into 'table' at once (used to load a binary snapshot)
+    # The records go in with one dict update and each unique index is rebuilt in one pass
+    def restore_many(self, table, records):
+        rows = getattr(self, table)
+        rows.update(zip([record.id for record in records], records))
+        for index in self.indexes[table].values():
+            index.rebuild(rows.values())
+
+    # Drop a restored task that has moved to the cold tier (used by journal replay)
+    def restore_archived(self, task_id):
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            for index in self.indexes['tasks'].values():
+                index.remove(task)
+            self.versions.pop(task_id, None)
+
+    # Set the status fields of a restored task (used by journal replay)
+    def restore_status(self, task_id, status, updated_at, completed_at):
+        task = self.tasks.get(task_id)
+        if task is not None:
+            task.status = status
+            task.updated_at = updated_at
+            task.completed_at = completed_at
+
+    # Rebuild the listings and aggregates and continue the ID counters after the restored records
+    def finish_restore(self):
+        if self.archive is not None:
+            # A crash can lose the journal entry of a task that did reach the cold tier
+            completed = [task.id for task in self.tasks.values() if task.status is TaskStatus.COMPLETED]
+            for task_id in self.archive.archived_ids(completed):
+                self.restore_archived(task_id)
+        # Build every id list in one pass over the tasks in id order
+        listings = {('users',): sorted(self.users), ('all',): sorted(self.tasks)}
+        for task_id in listings[('all',)]:
+            task = self.tasks[task_id]
+            listings.setdefault(('status', task.status), []).append(task_id)
+            if task.user_id is not None:
+                listings.setdefault(('user', task.user_id), []).append(task_id)
+                listings.setdefault(('user_status', task.user_id, task.status), []).append(task_id)
+        self.listings.rebuild({key: ids for key, ids in listings.items() if ids})
+        self.user_aggregates = rebuild_stats(self._all_tasks())
+        self.user_ids = itertools.count(max(self.users, default=0) + 1)
+        self.task_ids = itertools.count(max(self.tasks, default=0) + 1)
+        if self.archive is not None:
+            self._track_completions()
+
+    def close(self):
+        if self.archive is not None:
+            self.archive.close()
+        if self.journal is not None:
+            self.journal.close()
+
+
+# Create the store selected by 'backend' (or the TASK_MANAGER_STORAGE environment variable)
+def create_store(backend=None, path=None):
+    backend = backend or os.environ.get('TASK_MANAGER_STORAGE', 'memory')
+    if backend == 'memory':
+        store = MemoryStore()
+        # TASK_MANAGER_ARCHIVE names a directory for the cold tier of completed tasks;
+        # it is attached first, so journal replay already sees which tasks moved there
+        archive = os.environ.get('TASK_MANAGER_ARCHIVE')
+        if archive:
+            from utils.archive import open_archive
+            open_archive(
+                store, archive,
+                max_age=float(os.environ.get('TASK_MANAGER_ARCHIVE_AFTER', '86400')),
+                interval=float(os.environ.get('TASK_MANAGER_ARCHIVE_INTERVAL', '60'))
+            )
+        # TASK_MANAGER_JOURNAL names a directory that makes the memory store durable
+        directory = os.environ.get('TASK_MANAGER_JOURNAL')
+        if directory:
+            from utils.journal import open_journal
+            open_journal(
+                store, directory,
+                fsync_interval=float(os.environ.get('TASK_MANAGER_JOURNAL_FSYNC_INTERVAL', '0.05')),
+                snapshot_interval=float(os.environ.get('TASK_MANAGER_SNAPSHOT_INTERVAL', '3600')),
+                # 'binary' snapshots are memory-mapped at startup; 'ndjson' ones are plain text
+                snapshot_format=os.environ.get('TASK_MANAGER_SNAPSHOT_FORMAT', 'binary')
+            )
+        return store
+    if backend == 'sqlite':
+        from utils.sqlite_store import SQLiteStore
+        return SQLiteStore(path or os.environ.get('TASK_MANAGER_DATABASE', 'taskmanager.db'))
+    raise ValueError(f"Unknown storage backend '{backend}'")
@@ -17,25 +17,56 @@ def validate_payload(payload):
         return "Payload cannot be empty"
     return None
 
+# Patterns and prefixes are compiled once, at import, instead of on every request
+EMAIL_PATTERN = re.compile(r'^[\w\.-]+@[\w\.-]+\.\w+$')
+VALID_PHONE_PREFIXES = ('070', '080', '090', '081', '091')
+
+# Marks a field that is absent from the payload
+MISSING = object()
+
+# Largest integer a record can hold: SQLite stores integers as signed 64-bit values,
+# so larger ids, durations and query parameters are rejected before they reach a store
+MAX_INT64 = 2 ** 63 - 1
+
+# Check that a value is present and not blank
+# Only strings can be blank, so other values are accepted without being stringified
+def is_present(value):
+    return value is not MISSING and (not isinstance(value, str) or bool(value.strip()))
+
+# Check that a value is a string (free text such as a task description)
+def is_text(value):
+    return isinstance(value, str)
+
+# Check that a value is an alphabetic string of at least 'min' characters
+def is_alphabetic(value, min=3):
+    return isinstance(value, str) and value.isalpha() and len(value) >= min
+
+# Check that a value is a well-formed email address
+def is_email(value):
+    return isinstance(value, str) and EMAIL_PATTERN.match(value) is not None
+
+# Check that a value is a phone number: digits only, at least 'min' long, with a valid prefix
+def is_phone(value, min=11):
+    return isinstance(value, str) and value.isdigit() and len(value) >= min and value.startswith(VALID_PHONE_PREFIXES)
+
 # Ensure input field is present and non-empty in the payload
 def validate_required_fields(data, field):
     #Checks if  'Keys' exist in payload and ensure the 'value' is not empty
-    if field not in data or not str(data[field]).strip():
+    if not is_present(data.get(field, MISSING)):
         return f"{field.capitalize()} is required and cannot be empty"
     return None
 
 # Ensure input field only accept alphabet, and a minimum length of 3 characters
 def validate_field_length(data,field,min=3):
     # Checks if the value is missing from the dictionary, or if it is not an alphabet or if it is not up to three characters
-     if field not in data or not (data[field].isalpha())  or len(str(data[field]).strip()) < min:
+     if not is_alphabetic(data.get(field, MISSING), min):
           return f"{field.capitalize()} cannot be less than {min} alphabetic characters" 
      return None
 
 # Ensure email format is valid
 def validate_email(email):
-    pattern = r'^[\w\.-]+@[\w\.-]+\.\w+$'
-    # Use re.match to check if the email matches the pattern
-    return bool(re.match(pattern, email))
+    # Use the precompiled pattern to check the email
+    return is_email(email)
 
 # Ensure phone number is a digit and must not be less or greater than 11 digits
 def valid_phone_isDigit_and_length(phone, min = 11):
@@ -44,16 +75,19 @@ def valid_phone_isDigit_and_length(phone, min = 11):
 
 # Phone number should start with a valid prefix
 def valid_phone_format(phone):
-    #Checks if phone number starts with one of the valid prefixes in the list below.
-    valid_prefixes = ['070', '080', '090', '081', '091']
-    return any(phone.startswith(prefix) for prefix in valid_prefixes)
+    #Checks if phone number starts with one of the valid prefixes (str.startswith accepts a tuple)
+    return phone.startswith(VALID_PHONE_PREFIXES)
 
 # Validate phone number by checking both its length/digit format and valid prefix
 def validate_phone(phone):
-     return valid_phone_isDigit_and_length(phone) and valid_phone_format(phone)
+     return is_phone(phone)
 
 # Ensure input field uniqueness
-def validate_unique_field(tables, field, value):
+def validate_unique_field(tables, field, value, index=None):
+    # When a UniqueIndex for this field is supplied, answer with a single O(1) lookup
+    # instead of comparing against every record
+    if index is not None:
+        return value not in index
     # Checks If 'tables' is a dictionary, extract its values (records); otherwise,
     #  use it directly as a list.
     records = tables.values() if isinstance(tables, dict) else tables
@@ -67,11 +101,12 @@ def validate_unique_field(tables, field, value):
     )
 
 # Ensure input value is integer datatype
-def positive_integer(value, min = 1):
+def positive_integer(value, min = 1, max = MAX_INT64):
     # Check if the given 'value' is of integer type
-    # 'isinstance(value, int)' returns True if 'value' is an integer
-    # Also ensure that the integer is greater than or equal to the minimum value (default is 1)
-    return isinstance(value, int) and value >= min
+    # 'isinstance(value, int)' returns True if 'value' is an integer, and also for True/False
+    # (bool is a subclass of int), so booleans are ruled out explicitly
+    # Also ensure that the integer is between the minimum value (default is 1) and the maximum
+    return isinstance(value, int) and not isinstance(value, bool) and min <= value <= max
 
 # Ensure input value is float datatype
 def positive_float(value, min = 1.0):
@@ -87,3 +122,63 @@ def positive_value(value):
     # Calls the 'positive_float' function to validate float values
     # Returns True if either check passes (i.e., the value is a positive number)
     return positive_integer(value) or positive_float(value)
+
+# Declarative payload schemas
+# A schema maps each field to a list of rules, for example:
+#     compile_schema({'firstName': [required(), alphabetic()], 'email': [required(), email()]})
+# compile_schema turns it, once, into a single function that checks a payload in one pass
+# and returns every field error (an empty list when the payload is valid).
+# Each rule has a stage; checks run stage by stage (all "required" checks first, then the
+# format checks), so the first error is the one the old chained validate_* calls returned.
+# Once a field fails, its later rules are skipped.
+
+# A rule is (stage, test, message builder); 'test' receives the field value (or MISSING)
+def required():
+    return (0, is_present, lambda field: f"{field.capitalize()} is required and cannot be empty")
+
+# Rules reuse the is_*/positive_* predicates above, so both validation paths check the same thing
+def alphabetic(min=3):
+    def test(value):
+        return is_alphabetic(value, min)
+    return (1, test, lambda field: f"{field.capitalize()} cannot be less than {min} alphabetic characters")
+
+def text():
+    return (1, is_text, lambda field: f"{field.capitalize()} must be a string")
+
+def email(message="Invalid email format"):
+    return (2, is_email, lambda field: message)
+
+def phone(message):
+    return (3, is_phone, lambda field: message)
+
+def positive_int(message, min=1):
+    def test(value):
+        return positive_integer(value, min)
+    return (4, test, lambda field: message)
+
+# Compile a schema into a validator function
+def compile_schema(schema):
+    # Flatten the rules into (field, test, message) checks ordered by stage, then by field order
+    checks = sorted(
+        ((stage, position, field, test, message(field))
+         for position, (field, rules) in enumerate(schema.items())
+         for stage, test, message in rules),
+        key=lambda check: check[:2]
+    )
+    checks = tuple((field, test, message) for _, _, field, test, message in checks)
+
+    def validate(data):
+        error = validate_payload(data)
+        if error:
+            return [error]
+        errors = []
+        failed = None
+        get = data.get
+        for field, test, message in checks:
+            if test(get(field, MISSING)) or (failed and field in failed):
+                continue
+            errors.append(message)
+            failed = (failed or ()) + (field,)
+        return errors
+
+    return validate